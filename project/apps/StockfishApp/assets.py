@@ -0,0 +1,183 @@
+import re
+
+# files made by build_assets(), paths are relative to the static root
+BUNDLE_PATH = 'StockfishApp/js/bundle.mjs'
+SPRITE_PATH = 'StockfishApp/assets/pieces.svg'
+
+# ES modules in the order they go into the bundle, main.mjs runs code at the top level so it goes last
+JS_MODULES = ['stockfish.mjs', 'pieces.mjs', 'gui.mjs', 'gamestate.mjs', 'board.mjs', 'main.mjs']
+_JS_DIR = 'StockfishApp/js/'
+
+PIECE_COLORS = ['white', 'black']
+PIECE_NAMES = ['king', 'queen', 'rook', 'bishop', 'knight', 'pawn']
+_PIECE_SIZE = 45  # every piece svg is 45x45
+_PIECE_DIR = 'StockfishApp/assets/pieces/'
+
+_IMPORT_REGEX = re.compile(r'^[ \t]*import\s*\{([^}]*)\}\s*from\s*[\'"]\./([\w.]+)[\'"];?[ \t]*$', re.MULTILINE)
+_EXPORT_REGEX = re.compile(r'^[ \t]*export\s*\{([^}]*)\};?[ \t]*$', re.MULTILINE)
+_OTHER_MODULE_SYNTAX_REGEX = re.compile(r'^[ \t]*(import|export)\b', re.MULTILINE)
+
+_SVG_ROOT_REGEX = re.compile(r'<svg\b[^>]*>(.*)</svg>', re.DOTALL)
+_SVG_COMMENT_REGEX = re.compile(r'<!--.*?-->', re.DOTALL)
+
+# a '/' after one of these characters (or at the very start) starts a regex literal, otherwise it's a division
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^\n')
+
+
+def _names(name_list):
+    return [name.strip() for name in name_list.split(',') if name.strip()]
+
+
+def bundle_modules(modules):
+    """
+    joins ES modules into one module, returns str
+
+    each module body goes in its own block so top level names that are private to a module can't clash with another
+    module's. exported names are declared once at the top of the bundle, and each block assigns its exports to them
+    at the end through a setter function declared outside the block, which is what imports then refer to. only
+    'import { a, b } from './x.mjs'' and 'export { a, b };' are supported
+
+    Parameters:
+        modules (list): (filename, source) tuples in the order the modules should run
+    """
+    exported = []
+    blocks = []
+
+    for filename, source in modules:
+        names = [name for match in _EXPORT_REGEX.findall(source) for name in _names(match)]
+        body = _EXPORT_REGEX.sub('', _IMPORT_REGEX.sub('', source))
+
+        if _OTHER_MODULE_SYNTAX_REGEX.search(body):
+            raise ValueError(f'{filename} uses import/export syntax the bundler doesn\'t support')
+
+        exported += names
+
+        if names:
+            setter = '__export_' + re.sub(r'\W', '_', filename)
+            assignments = ' '.join(f'{name} = m.{name};' for name in names)
+            blocks.append(f'function {setter}(m){{ {assignments} }}\n')
+            body += f'\n{setter}({{ {", ".join(names)} }});\n'
+
+        blocks.append(f'// {filename}\n{{\n{body}\n}}\n')
+
+    header = f'let {", ".join(exported)};\n' if exported else ''
+    return header + ''.join(blocks)
+
+
+def minify_js(source):
+    """
+    removes comments, indentation, blank lines and repeated spaces from javascript, returns str
+
+    line breaks are kept so automatic semicolon insertion still works, strings, template literals and regex literals
+    are copied unchanged
+    """
+    out = []
+    ind, length = 0, len(source)
+    last = '\n'  # last character written that isn't a space
+
+    def copy_quoted(start, quote):
+        """returns index after the closing quote, skipping escaped characters"""
+        pos = start + 1
+        in_class = False
+        while pos < length:
+            char = source[pos]
+            if char == '\\':
+                pos += 2
+                continue
+            if quote == '/' and char == '[':
+                in_class = True
+            elif quote == '/' and char == ']':
+                in_class = False
+            elif char == quote and not in_class:
+                return pos + 1
+            pos += 1
+        raise ValueError('unterminated string, template or regex literal')
+
+    while ind < length:
+        char = source[ind]
+
+        if source.startswith('//', ind):
+            ind = source.find('\n', ind)
+            ind = length if ind == -1 else ind
+        elif source.startswith('/*', ind):
+            end = source.find('*/', ind + 2)
+            if end == -1:
+                raise ValueError('unterminated comment')
+            ind = end + 2
+            if out and out[-1] not in ' \n':
+                out.append(' ')  # comments separate tokens
+        elif char in '\'"`' or (char == '/' and last in _REGEX_PRECEDERS):
+            end = copy_quoted(ind, char)
+            if char == '/':
+                while end < length and source[end].isalpha():  # regex flags
+                    end += 1
+            out.append(source[ind:end])
+            last = source[end - 1]
+            ind = end
+        elif char == '\n':
+            while out and out[-1] == ' ':
+                out.pop()
+            if out and out[-1] != '\n':
+                out.append('\n')
+            last = '\n'
+            ind += 1
+        elif char in ' \t\r':
+            if out and out[-1] not in ' \n':
+                out.append(' ')
+            ind += 1
+        else:
+            out.append(char)
+            last = char
+            ind += 1
+
+    return ''.join(out).strip() + '\n'
+
+
+def build_sprite(pieces):
+    """
+    puts several 45x45 svgs side by side in one svg, returns str
+
+    every piece gets a <view> element so an <img> can show just that piece with 'pieces.svg#<id>'
+
+    Parameters:
+        pieces (list): (id, svg source) tuples
+    """
+    views = []
+    shapes = []
+
+    for ind, (piece_id, source) in enumerate(pieces):
+        match = _SVG_ROOT_REGEX.search(_SVG_COMMENT_REGEX.sub('', source))
+        if not match:
+            raise ValueError(f'no <svg> element in {piece_id}')
+
+        content = re.sub(r'>\s+<', '><', match.group(1).strip())
+        content = re.sub(r'\s+', ' ', content)
+
+        x = ind * _PIECE_SIZE
+        views.append(f'<view id="{piece_id}" viewBox="{x} 0 {_PIECE_SIZE} {_PIECE_SIZE}"/>')
+        shapes.append(f'<svg x="{x}" y="0" width="{_PIECE_SIZE}" height="{_PIECE_SIZE}">{content}</svg>')
+
+    width = len(pieces) * _PIECE_SIZE
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" width="{width}" height="{_PIECE_SIZE}" '
+        f'viewBox="0 0 {width} {_PIECE_SIZE}">{"".join(views)}{"".join(shapes)}</svg>\n'
+    )
+
+
+def build_assets(read):
+    """
+    makes the js bundle and the piece sprite, returns dict mapping path (relative to the static root) to bytes
+
+    Parameters:
+        read (function): takes a path relative to the static root, returns the file's contents as str
+    """
+    modules = [(filename, read(_JS_DIR + filename)) for filename in JS_MODULES]
+    pieces = [
+        (f'{color}-{piece}', read(f'{_PIECE_DIR}{color}/{piece}.svg'))
+        for color in PIECE_COLORS for piece in PIECE_NAMES
+    ]
+
+    return {
+        BUNDLE_PATH: minify_js(bundle_modules(modules)).encode(),
+        SPRITE_PATH: build_sprite(pieces).encode(),
+    }
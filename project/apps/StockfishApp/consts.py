@@ -1 +1,4 @@
-STOCKFISH_PATH = r'..\..\PycharmProjects\BrowserChessVsStockfish\Stockfish\stockfish.exe'
\ No newline at end of file
+STOCKFISH_PATH = r'..\..\PycharmProjects\BrowserChessVsStockfish\Stockfish\stockfish.exe'
+
+# built by 'python manage.py buildbook', the app plays without it if the file doesn't exist
+OPENING_BOOK_PATH = r'..\..\PycharmProjects\BrowserChessVsStockfish\Stockfish\openingbook.bin'
@@ -0,0 +1,75 @@
+import threading
+
+# weight of the newest search time in the moving average
+_SMOOTHING = 0.2
+
+
+class DepthController():
+    """
+    picks the search depth for each request based on how loaded the engine pool is
+
+    load is measured two ways: how many requests are queued per engine, and how far the moving average of recent
+    search times is over target_seconds. with no load every difficulty searches at its max depth, as load grows the
+    depth falls towards the difficulty's min depth, and it climbs back up as the queue drains and searches speed up
+
+    Parameters:
+        depth_limits (dict): maps difficulty to (min depth, max depth)
+        process_count (int): number of engines serving the queue
+        target_seconds (float): search time the pool should stay under
+    """
+
+    def __init__(self, depth_limits, process_count, target_seconds):
+        self._depth_limits = depth_limits
+        self._process_count = process_count
+        self._target_seconds = target_seconds
+
+        self._lock = threading.Lock()
+        self._avg_seconds = 0.0
+        self._searches = 0
+        self._reduced_searches = 0  # searches run below their difficulty's max depth
+        self._last_depths = {difficulty: high for difficulty, (low, high) in depth_limits.items()}
+
+    def pressure(self, queued):
+        """returns 0 when the pool keeps up with queued waiting requests, up to 1 when it is badly overloaded"""
+        backlog = queued / self._process_count
+        slowness = self._avg_seconds / self._target_seconds - 1
+
+        return min(max(backlog, slowness, 0.0), 1.0)
+
+    def depth_for(self, difficulty, queued):
+        """
+        returns the depth to search a request of difficulty at while queued other requests are waiting
+
+        a difficulty without depth limits uses the limits of the closest one that has them, this runs in the
+        dispatcher thread so it must not raise for a bad request
+        """
+        if difficulty not in self._depth_limits:
+            difficulty = min(self._depth_limits, key=lambda known: abs(known - difficulty))
+        low, high = self._depth_limits[difficulty]
+        depth = high - round(self.pressure(queued) * (high - low))
+
+        with self._lock:
+            self._last_depths[difficulty] = depth
+            self._searches += 1
+            self._reduced_searches += depth < high
+
+        return depth
+
+    def record(self, seconds):
+        """adds the time a search took to the moving average, returns None"""
+        with self._lock:
+            if self._avg_seconds:
+                self._avg_seconds += _SMOOTHING * (seconds - self._avg_seconds)
+            else:
+                self._avg_seconds = seconds
+
+    def metrics(self):
+        """returns dict of the controller's state for monitoring"""
+        with self._lock:
+            return {
+                'avg_search_seconds': round(self._avg_seconds, 4),
+                'target_search_seconds': self._target_seconds,
+                'searches': self._searches,
+                'reduced_depth_searches': self._reduced_searches,
+                'depth_by_difficulty': dict(self._last_depths),
+            }
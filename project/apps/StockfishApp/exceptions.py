@@ -1,2 +1,6 @@
 class InvalidPositionException(Exception):
     pass
+
+
+class IllegalMoveException(InvalidPositionException):
+    pass
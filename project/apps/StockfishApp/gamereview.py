@@ -0,0 +1,81 @@
+from contextlib import closing
+from .gamestate import Position, WHITE
+from . import stockfishdispatcher
+
+# centipawns lost compared to the engine's best move for each flag
+_FLAGS = ((300, 'blunder'), (100, 'mistake'), (50, 'inaccuracy'))
+
+# mate scores are turned into centipawns so they can be compared with normal evaluations,
+# mate in 1 is worth slightly more than mate in 2 etc.
+_MATE_SCORE = 10000
+
+
+def _score(analysis, pos):
+    """returns the evaluation of pos in centipawns from the point of view of the side to move"""
+    if analysis['bestmove'] == '(none)':
+        # no legal moves, the engine doesn't give a usable score for checkmate or stalemate
+        return -_MATE_SCORE if pos.is_check() else 0
+
+    info = analysis['info']
+    if info is None:
+        return 0
+    if info.mate is not None:
+        return _MATE_SCORE - info.mate if info.mate > 0 else -_MATE_SCORE - info.mate
+
+    return info.score
+
+
+def _flag(loss):
+    for threshold, flag in _FLAGS:
+        if loss >= threshold:
+            return flag
+
+    return None
+
+
+def review_game(fenstring, moves, depth=None):
+    """
+    analyzes every move of a game, yields one dict per move as soon as the positions before and after it are done
+
+    the moves are expected to be legal, the yielded dicts are in the order they finish, not move order:
+        'ply' (int): 1 for the first move of the game
+        'move' (str): the move played
+        'eval' (int): centipawns from white's point of view after the move
+        'best_move' (str): the engine's choice in the position before the move
+        'best_eval' (int): centipawns from white's point of view if best_move had been played
+        'loss' (int): centipawns the mover lost compared to best_move
+        'flag' (str or None): 'inaccuracy', 'mistake' or 'blunder'
+    """
+    positions = [Position(fenstring, moves[:ind]) for ind in range(len(moves) + 1)]
+    first_turn = positions[0].board.turn
+
+    scores = {}  # maps position index to score from the side to move's point of view
+    best_moves = {}
+
+    # closing the analyses when this generator is closed cancels the positions still waiting for an engine
+    with closing(stockfishdispatcher.analyze_positions(positions, depth)) as analyses:
+        for ind, analysis in analyses:
+            scores[ind] = _score(analysis, positions[ind])
+            best_moves[ind] = analysis['bestmove']
+
+            # the move into this position and the move out of it may now have both their positions analyzed
+            for move_ind in (ind - 1, ind):
+                if move_ind < 0 or move_ind >= len(moves) or move_ind not in scores or move_ind + 1 not in scores:
+                    continue
+
+                # white's point of view is the mover's when white made the move
+                sign = 1 if (move_ind % 2 == 0) == (first_turn == WHITE) else -1
+                best_eval = scores[move_ind]
+                played_eval = -scores[move_ind + 1]  # the score after the move is from the opponent's point of view
+
+                loss = 0 if moves[move_ind] == best_moves[move_ind] else max(best_eval - played_eval, 0)
+
+                yield {
+                    'ply': move_ind + 1,
+                    'move': moves[move_ind],
+                    'eval': sign * played_eval,
+                    'best_move': best_moves[move_ind],
+                    'best_eval': sign * best_eval,
+                    'loss': loss,
+                    'flag': _flag(loss),
+                }
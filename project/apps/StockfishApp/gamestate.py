@@ -1,15 +1,415 @@
 import re
-from .exceptions import InvalidPositionException
+from .exceptions import InvalidPositionException, IllegalMoveException
 
 # regex for fenstring https://regex101.com/r/ggu4ri/1
 FEN_REGEX = re.compile(r'([rRnNbBqQkKpP1-8]{1,8}\/){7}[rRnNbBqQkKpP1-8]{1,8}\s[wb]\s((K{0,1}Q{0,1}k{0,1}q{0,1})|(-))\s(([a-h][1-8])+|-)\s\d+\s\d+')
 
+# regex for a move in the long algebraic notation used by UCI, e.g. 'e2e4' or 'e7e8q'
+MOVE_REGEX = re.compile(r'[a-h][1-8][a-h][1-8][qrbn]?')
+
+# fen of the position every game starts from
+STARTING_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+# squares are numbered 0 (a1) to 63 (h8), bitboards are ints with bit n set if square n is in the set
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+_FILES = 'abcdefgh'
+_PIECE_LETTERS = 'pnbrqk'  # indexed by piece type, doubles as the promotion letters of UCI moves
+_FULL = (1 << 64) - 1
+_RANK_1 = 0xff
+_RANK_3 = _RANK_1 << 16
+_RANK_6 = _RANK_1 << 40
+_RANK_8 = _RANK_1 << 56
+
+# castling rights bits
+_WHITE_KINGSIDE, _WHITE_QUEENSIDE, _BLACK_KINGSIDE, _BLACK_QUEENSIDE = 1, 2, 4, 8
+_CASTLING_LETTERS = ((_WHITE_KINGSIDE, 'K'), (_WHITE_QUEENSIDE, 'Q'), (_BLACK_KINGSIDE, 'k'), (_BLACK_QUEENSIDE, 'q'))
+
 
 def is_valid_fen(fen):
     """check if fenstring matches regex, returns None"""
     return FEN_REGEX.fullmatch(fen)  # returns a re.Match() object (evaluations to True in bool check) if fen matches, or None
 
 
+def encode_move(move):
+    """
+    packs a UCI move string into a 16 bit int, returns int
+
+    bits 0-5 are the from square, bits 6-11 the to square and bits 12-14 the promotion piece type (0 if none)
+    """
+    if not MOVE_REGEX.fullmatch(move):
+        raise ValueError(f'invalid move: {move!r}')
+
+    from_sq = _FILES.index(move[0]) + (int(move[1]) - 1) * 8
+    to_sq = _FILES.index(move[2]) + (int(move[3]) - 1) * 8
+    promotion = _PIECE_LETTERS.index(move[4]) if len(move) == 5 else 0
+
+    return from_sq | (to_sq << 6) | (promotion << 12)
+
+
+def decode_move(packed):
+    """unpacks an int made by encode_move(), returns the UCI move string"""
+    from_sq, to_sq, promotion = packed & 0x3f, (packed >> 6) & 0x3f, packed >> 12
+
+    move = _square_name(from_sq) + _square_name(to_sq)
+    if promotion:
+        move += _PIECE_LETTERS[promotion]
+
+    return move
+
+
+def _square_name(sq):
+    return f'{_FILES[sq % 8]}{sq // 8 + 1}'
+
+
+def _bits(bitboard):
+    """yields the square of every set bit in bitboard, lowest first"""
+    while bitboard:
+        lsb = bitboard & -bitboard
+        yield lsb.bit_length() - 1
+        bitboard ^= lsb
+
+
+def _step_attacks(deltas):
+    """returns list mapping each square to the bitboard of squares one (file, rank) step away in deltas"""
+    table = []
+    for sq in range(64):
+        file, rank = sq % 8, sq // 8
+        attacks = 0
+        for file_delta, rank_delta in deltas:
+            if 0 <= file + file_delta < 8 and 0 <= rank + rank_delta < 8:
+                attacks |= 1 << (sq + file_delta + rank_delta * 8)
+        table.append(attacks)
+    return table
+
+
+def _rays(file_delta, rank_delta):
+    """returns list mapping each square to the bitboard of the ray from it (exclusive) to the board edge"""
+    table = []
+    for sq in range(64):
+        file, rank = sq % 8 + file_delta, sq // 8 + rank_delta
+        ray = 0
+        while 0 <= file < 8 and 0 <= rank < 8:
+            ray |= 1 << (file + rank * 8)
+            file, rank = file + file_delta, rank + rank_delta
+        table.append(ray)
+    return table
+
+
+# precomputed attack tables
+_KNIGHT_ATTACKS = _step_attacks([(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)])
+_KING_ATTACKS = _step_attacks([(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)])
+_PAWN_ATTACKS = (_step_attacks([(-1, 1), (1, 1)]), _step_attacks([(-1, -1), (1, -1)]))  # indexed by color
+
+# (rays, True if the ray goes towards higher squares) for each direction, the first blocker on a ray going up is its
+# lowest set bit and on a ray going down its highest
+_ROOK_RAYS = [(_rays(1, 0), True), (_rays(0, 1), True), (_rays(-1, 0), False), (_rays(0, -1), False)]
+_BISHOP_RAYS = [(_rays(1, 1), True), (_rays(-1, 1), True), (_rays(1, -1), False), (_rays(-1, -1), False)]
+
+# ANDed into the castling rights when a move starts or ends on a square, so moving a king or rook
+# or capturing a rook removes the matching rights
+_CASTLING_MASKS = [0xf] * 64
+_CASTLING_MASKS[0] &= ~_WHITE_QUEENSIDE
+_CASTLING_MASKS[7] &= ~_WHITE_KINGSIDE
+_CASTLING_MASKS[4] &= ~(_WHITE_KINGSIDE | _WHITE_QUEENSIDE)
+_CASTLING_MASKS[56] &= ~_BLACK_QUEENSIDE
+_CASTLING_MASKS[63] &= ~_BLACK_KINGSIDE
+_CASTLING_MASKS[60] &= ~(_BLACK_KINGSIDE | _BLACK_QUEENSIDE)
+
+# (right, king from, king to, squares that must be empty, squares the king passes that must not be attacked)
+_CASTLES = (
+    (
+        (_WHITE_KINGSIDE, 4, 6, (1 << 5) | (1 << 6), (5, 6)),
+        (_WHITE_QUEENSIDE, 4, 2, (1 << 1) | (1 << 2) | (1 << 3), (3, 2)),
+    ),
+    (
+        (_BLACK_KINGSIDE, 60, 62, (1 << 61) | (1 << 62), (61, 62)),
+        (_BLACK_QUEENSIDE, 60, 58, (1 << 57) | (1 << 58) | (1 << 59), (59, 58)),
+    ),
+)
+
+
+def _slider_attacks(sq, occupied, rays):
+    """returns bitboard of the squares a slider on sq attacks, stopping at (and including) the first blocker"""
+    attacks = 0
+    for table, upwards in rays:
+        ray = table[sq]
+        blockers = ray & occupied
+        if blockers:
+            first = (blockers & -blockers).bit_length() - 1 if upwards else blockers.bit_length() - 1
+            ray ^= table[first]
+        attacks |= ray
+    return attacks
+
+
+class Board():
+    """
+    bitboard representation of a chess position that can generate legal moves
+
+    moves are ints packed by encode_move(), boards are treated as immutable: apply() returns a new Board
+    """
+
+    __slots__ = ('_pieces', '_occupied', '_squares', 'turn', 'castling', 'ep_square', 'halfmove_clock', 'fullmove_number')
+
+    def __init__(self, fenstring=STARTING_FEN):
+        self._pieces = [[0] * 6, [0] * 6]  # bitboard for each [color][piece type]
+        self._occupied = [0, 0]  # bitboard of each color's pieces
+        self._squares = [None] * 64  # (color, piece type) on each square
+
+        try:
+            placement, turn, castling, ep_square, halfmove, fullmove = fenstring.split()
+
+            ranks = placement.split('/')
+            if len(ranks) != 8:
+                raise ValueError('board needs 8 ranks')
+
+            for rank_ind, rank in enumerate(ranks):
+                file = 0
+                for char in rank:
+                    if char.isdigit():
+                        file += int(char)
+                    else:
+                        if file > 7:
+                            raise ValueError('rank has more than 8 squares')
+                        color = WHITE if char.isupper() else BLACK
+                        self._put((7 - rank_ind) * 8 + file, color, _PIECE_LETTERS.index(char.lower()))
+                        file += 1
+                if file != 8:
+                    raise ValueError('rank doesn\'t have 8 squares')
+
+            self.turn = WHITE if turn == 'w' else BLACK
+            self.castling = 0
+            for right, letter in _CASTLING_LETTERS:
+                if letter in castling:
+                    self.castling |= right
+            if ep_square != '-' and len(ep_square) != 2:
+                raise ValueError('en passant target must be a single square')
+            self.ep_square = None if ep_square == '-' else _FILES.index(ep_square[0]) + (int(ep_square[1]) - 1) * 8
+            self.halfmove_clock = int(halfmove)
+            self.fullmove_number = int(fullmove)
+        except ValueError as err:
+            raise InvalidPositionException(f'Invalid fenstring, {err}')
+
+        self._check_legal()
+
+    def _check_legal(self):
+        """raises InvalidPositionException for positions the engine can't handle, returns None"""
+        for color in (WHITE, BLACK):
+            if bin(self._pieces[color][KING]).count('1') != 1:
+                raise InvalidPositionException('Invalid position, each side needs exactly one king')
+
+        if (self._pieces[WHITE][PAWN] | self._pieces[BLACK][PAWN]) & (_RANK_1 | _RANK_8):
+            raise InvalidPositionException('Invalid position, pawns can\'t be on the first or last rank')
+
+        if self.is_attacked(self.king_square(1 - self.turn), self.turn):
+            raise InvalidPositionException('Invalid position, the side not to move is in check')
+
+        # the en passant square has to be the empty square a pawn just skipped over, on the 6th rank from the point
+        # of view of the side to move, with that pawn just behind it
+        if self.ep_square is not None:
+            rank, behind = (5, self.ep_square - 8) if self.turn == WHITE else (2, self.ep_square + 8)
+            if self.ep_square // 8 != rank or self._squares[self.ep_square] is not None \
+                    or self._squares[behind] != (1 - self.turn, PAWN):
+                raise InvalidPositionException('Invalid position, no pawn can be captured en passant')
+
+        # drop rights that can't be used because the king or rook has moved, so fen() matches what the engine sees
+        for right, king_from, king_to, _, _ in _CASTLES[WHITE] + _CASTLES[BLACK]:
+            color = WHITE if king_from == 4 else BLACK
+            rook_sq = king_from + 3 if king_to > king_from else king_from - 4
+            if self._squares[king_from] != (color, KING) or self._squares[rook_sq] != (color, ROOK):
+                self.castling &= ~right
+
+    def _put(self, sq, color, piece_type):
+        bit = 1 << sq
+        self._pieces[color][piece_type] |= bit
+        self._occupied[color] |= bit
+        self._squares[sq] = (color, piece_type)
+
+    def _remove(self, sq):
+        color, piece_type = self._squares[sq]
+        bit = 1 << sq
+        self._pieces[color][piece_type] ^= bit
+        self._occupied[color] ^= bit
+        self._squares[sq] = None
+
+    def copy(self):
+        """returns a copy of the board that can be changed without affecting this one"""
+        board = Board.__new__(Board)
+        board._pieces = [self._pieces[WHITE][:], self._pieces[BLACK][:]]
+        board._occupied = self._occupied[:]
+        board._squares = self._squares[:]
+        board.turn = self.turn
+        board.castling = self.castling
+        board.ep_square = self.ep_square
+        board.halfmove_clock = self.halfmove_clock
+        board.fullmove_number = self.fullmove_number
+        return board
+
+    def piece_at(self, sq):
+        """returns (color, piece type) of the piece on sq, or None if the square is empty"""
+        return self._squares[sq]
+
+    def king_square(self, color):
+        return self._pieces[color][KING].bit_length() - 1
+
+    def is_attacked(self, sq, by_color):
+        """returns True if any piece of by_color attacks sq"""
+        pieces = self._pieces[by_color]
+        occupied = self._occupied[WHITE] | self._occupied[BLACK]
+
+        # a pawn of by_color attacks sq if a pawn of the other color on sq would attack it
+        return bool(
+            (_PAWN_ATTACKS[1 - by_color][sq] & pieces[PAWN])
+            or (_KNIGHT_ATTACKS[sq] & pieces[KNIGHT])
+            or (_KING_ATTACKS[sq] & pieces[KING])
+            or (_slider_attacks(sq, occupied, _BISHOP_RAYS) & (pieces[BISHOP] | pieces[QUEEN]))
+            or (_slider_attacks(sq, occupied, _ROOK_RAYS) & (pieces[ROOK] | pieces[QUEEN]))
+        )
+
+    def is_check(self):
+        """returns True if the side to move is in check"""
+        return self.is_attacked(self.king_square(self.turn), 1 - self.turn)
+
+    def pseudo_legal_moves(self):
+        """returns list of moves that follow the piece movement rules but may leave the mover's king in check"""
+        us, them = self.turn, 1 - self.turn
+        pieces = self._pieces[us]
+        own, enemy = self._occupied[us], self._occupied[them]
+        occupied = own | enemy
+        moves = []
+
+        # pawn pushes, shifted as whole bitboards
+        pawns = pieces[PAWN]
+        if us == WHITE:
+            single = (pawns << 8) & ~occupied & _FULL
+            double = ((single & _RANK_3) << 8) & ~occupied & _FULL
+            step = 8
+        else:
+            single = (pawns >> 8) & ~occupied
+            double = ((single & _RANK_6) >> 8) & ~occupied
+            step = -8
+
+        for to_sq in _bits(single):
+            self._add_pawn_moves(moves, to_sq - step, to_sq)
+        for to_sq in _bits(double):
+            moves.append((to_sq - 2 * step) | (to_sq << 6))
+
+        # pawn captures, including en passant
+        targets = enemy | (1 << self.ep_square if self.ep_square is not None else 0)
+        for from_sq in _bits(pawns):
+            for to_sq in _bits(_PAWN_ATTACKS[us][from_sq] & targets):
+                self._add_pawn_moves(moves, from_sq, to_sq)
+
+        for from_sq in _bits(pieces[KNIGHT]):
+            for to_sq in _bits(_KNIGHT_ATTACKS[from_sq] & ~own):
+                moves.append(from_sq | (to_sq << 6))
+
+        for from_sq in _bits(pieces[BISHOP] | pieces[QUEEN]):
+            for to_sq in _bits(_slider_attacks(from_sq, occupied, _BISHOP_RAYS) & ~own):
+                moves.append(from_sq | (to_sq << 6))
+
+        for from_sq in _bits(pieces[ROOK] | pieces[QUEEN]):
+            for to_sq in _bits(_slider_attacks(from_sq, occupied, _ROOK_RAYS) & ~own):
+                moves.append(from_sq | (to_sq << 6))
+
+        king_sq = self.king_square(us)
+        for to_sq in _bits(_KING_ATTACKS[king_sq] & ~own):
+            moves.append(king_sq | (to_sq << 6))
+
+        # castling, the king can't castle out of or through check
+        for right, king_from, king_to, empty, passed in _CASTLES[us]:
+            if (
+                self.castling & right
+                and not occupied & empty
+                and not self.is_attacked(king_from, them)
+                and not any(self.is_attacked(sq, them) for sq in passed)
+            ):
+                moves.append(king_from | (king_to << 6))
+
+        return moves
+
+    @staticmethod
+    def _add_pawn_moves(moves, from_sq, to_sq):
+        if to_sq >= 56 or to_sq < 8:
+            moves.extend(from_sq | (to_sq << 6) | (promotion << 12) for promotion in (QUEEN, ROOK, BISHOP, KNIGHT))
+        else:
+            moves.append(from_sq | (to_sq << 6))
+
+    def apply(self, move):
+        """returns a new Board with move played, the move isn't checked for legality"""
+        from_sq, to_sq, promotion = move & 0x3f, (move >> 6) & 0x3f, move >> 12
+        us = self.turn
+        piece_type = self._squares[from_sq][1]
+        capture = self._squares[to_sq] is not None
+
+        board = self.copy()
+        board._remove(from_sq)
+        if capture:
+            board._remove(to_sq)
+        board._put(to_sq, us, promotion or piece_type)
+
+        board.ep_square = None
+        if piece_type == PAWN:
+            if to_sq == self.ep_square:
+                board._remove(to_sq - 8 if us == WHITE else to_sq + 8)
+                capture = True
+            elif abs(to_sq - from_sq) == 16:
+                board.ep_square = (from_sq + to_sq) // 2
+        elif piece_type == KING and abs(to_sq - from_sq) == 2:
+            # castling, move the rook to the other side of the king
+            rook_from, rook_to = (from_sq + 3, from_sq + 1) if to_sq > from_sq else (from_sq - 4, from_sq - 1)
+            board._remove(rook_from)
+            board._put(rook_to, us, ROOK)
+
+        board.castling &= _CASTLING_MASKS[from_sq] & _CASTLING_MASKS[to_sq]
+        board.halfmove_clock = 0 if piece_type == PAWN or capture else self.halfmove_clock + 1
+        board.fullmove_number = self.fullmove_number + (us == BLACK)
+        board.turn = 1 - us
+
+        return board
+
+    def _is_king_safe_after(self, move):
+        """returns True if move doesn't leave the mover's king in check"""
+        board = self.apply(move)
+        return not board.is_attacked(board.king_square(self.turn), board.turn)
+
+    def is_legal(self, move):
+        """returns True if move is legal in this position"""
+        return move in self.pseudo_legal_moves() and self._is_king_safe_after(move)
+
+    def legal_moves(self):
+        """returns list of legal moves"""
+        return [move for move in self.pseudo_legal_moves() if self._is_king_safe_after(move)]
+
+    def fen(self):
+        """returns the fenstring of the board"""
+        ranks = []
+        for rank in range(7, -1, -1):
+            row, empty = '', 0
+            for file in range(8):
+                piece = self._squares[rank * 8 + file]
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    row, empty = row + str(empty), 0
+                letter = _PIECE_LETTERS[piece[1]]
+                row += letter.upper() if piece[0] == WHITE else letter
+            ranks.append(row + (str(empty) if empty else ''))
+
+        castling = ''.join(letter for right, letter in _CASTLING_LETTERS if self.castling & right) or '-'
+
+        # like stockfish, only give the en passant square when a pawn can actually capture on it
+        ep_square = '-'
+        if self.ep_square is not None and _PAWN_ATTACKS[1 - self.turn][self.ep_square] & self._pieces[self.turn][PAWN]:
+            ep_square = _square_name(self.ep_square)
+
+        turn = 'w' if self.turn == WHITE else 'b'
+
+        return f'{"/".join(ranks)} {turn} {castling} {ep_square} {self.halfmove_clock} {self.fullmove_number}'
+
+
 class Position():
     """represents the board state in a way that can be given to the position command of stockfish"""
 
@@ -28,6 +428,10 @@ class Position():
         if moves:
             self._moves = 'moves ' + ' '.join(moves)
 
+        self._fenstring = fenstring or STARTING_FEN
+        self._move_list = list(moves) if moves else []
+        self._board = None  # only built when something needs the rules of the game, see the board property
+
         self._hash_val = Position._count
         Position._count += 1
 
@@ -48,3 +452,59 @@ class Position():
     @property
     def moves(self):
         return self._moves
+
+    @property
+    def move_list(self):
+        return self._move_list
+
+    @property
+    def board(self):
+        """
+        the Board after all the moves have been played, built on first use
+
+        raises InvalidPositionException if the fenstring isn't a playable position, or IllegalMoveException if one
+        of the moves isn't legal
+        """
+        if self._board is None:
+            board = Board(self._fenstring)
+            for move in self._move_list:
+                board = _play(board, move)
+            self._board = board
+
+        return self._board
+
+    def push(self, move):
+        """plays a UCI move string (e.g. 'e2e4'), raises IllegalMoveException if it isn't legal, returns None"""
+        self._board = _play(self.board, move)
+        self._move_list.append(move)
+        self._moves = 'moves ' + ' '.join(self._move_list)
+
+    def legal_moves(self):
+        """returns list of the legal moves as UCI strings"""
+        return [decode_move(move) for move in self.board.legal_moves()]
+
+    def is_check(self):
+        return self.board.is_check()
+
+    def is_checkmate(self):
+        return self.board.is_check() and not self.board.legal_moves()
+
+    def is_stalemate(self):
+        return not self.board.is_check() and not self.board.legal_moves()
+
+    def fen(self):
+        """returns the fenstring of the position after all the moves"""
+        return self.board.fen()
+
+
+def _play(board, move):
+    """returns a new Board with the UCI move string played, raises IllegalMoveException if it isn't legal"""
+    try:
+        packed = encode_move(move)
+    except ValueError:
+        raise IllegalMoveException(f'Illegal move {move!r}, not a UCI move string')
+
+    if not board.is_legal(packed):
+        raise IllegalMoveException(f'Illegal move {move!r} in position {board.fen()}')
+
+    return board.apply(packed)
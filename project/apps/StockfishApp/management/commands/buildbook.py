@@ -0,0 +1,89 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from project.apps.StockfishApp.stockfishdispatcher import _PROCESS_POOL, _PROCESS_COUNT
+from project.apps.StockfishApp.openingbook import book_key, write_book
+from project.apps.StockfishApp.gamestate import Position
+from project.apps.StockfishApp.consts import OPENING_BOOK_PATH
+
+
+class Command(BaseCommand):
+    help = (
+        'Searches the opening tree with the engine pool and writes the engine\'s moves to an opening book file. '
+        'Every legal player move is followed, engine moves are sampled several times so the book keeps the '
+        'randomness of the lower skill levels.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plies', type=int, default=4, help='number of plies from the start of the game to cover')
+        parser.add_argument('--samples', type=int, default=8, help='searches per position, each result adds 1 to that move\'s weight')
+        parser.add_argument('--depth', type=int, default=None, help='search depth, defaults to the engine config depth')
+        parser.add_argument('--difficulty', type=int, action='append', choices=range(1, 6), help='difficulty to build, can be repeated (default: all)')
+        parser.add_argument('--output', default=OPENING_BOOK_PATH, help='path of the book file')
+
+    def handle(self, *args, **options):
+        if options['plies'] < 1 or options['samples'] < 1:
+            raise CommandError('--plies and --samples must be at least 1')
+
+        difficulties = options['difficulty'] or [1, 2, 3, 4, 5]
+        entries = {}
+        legal_moves = {}  # the player's moves don't depend on difficulty, so they're only generated once per position
+
+        with ThreadPoolExecutor(max_workers=_PROCESS_COUNT) as executor:
+            for difficulty in difficulties:
+                # engine plays white (moves on even plies) and then black (moves on odd plies)
+                for engine_parity in (0, 1):
+                    frontier = [()]
+
+                    for ply in range(options['plies']):
+                        last_ply = ply == options['plies'] - 1
+                        next_frontier = []
+
+                        if ply % 2 == engine_parity:
+                            results = executor.map(
+                                lambda moves: _sample_moves(difficulty, moves, options['samples'], options['depth']),
+                                frontier
+                            )
+                            for moves, counts in zip(frontier, results):
+                                if not counts:
+                                    continue  # game is over in this position
+
+                                entries[book_key(difficulty, moves)] = list(counts.items())
+                                next_frontier += [moves + (move,) for move in counts]
+
+                        elif not last_ply:
+                            missing = [moves for moves in frontier if moves not in legal_moves]
+                            legal_moves.update(zip(missing, executor.map(_legal_moves, missing)))
+                            next_frontier = [moves + (move,) for moves in frontier for move in legal_moves[moves]]
+
+                        frontier = next_frontier
+
+                self.stdout.write(f'difficulty {difficulty}: {len(entries)} positions in book so far')
+
+        write_book(options['output'], entries)
+        self.stdout.write(self.style.SUCCESS(f'wrote {len(entries)} positions to {options["output"]}'))
+
+
+def _sample_moves(difficulty, moves, samples, depth):
+    """searches the position after moves samples times on one engine, returns Counter of the bestmove outputs"""
+    proc = _PROCESS_POOL.get(difficulty)
+    try:
+        proc.new_game()
+        proc.set_difficulty(difficulty)
+        pos = Position(moves=list(moves))
+
+        counts = Counter(proc.get_next_move(pos, depth) for _ in range(samples))
+    finally:
+        _PROCESS_POOL.put(proc)
+
+    counts.pop('(none)', None)  # checkmate or stalemate
+    return counts
+
+
+def _legal_moves(moves):
+    """returns the legal moves in the position after moves"""
+    proc = _PROCESS_POOL.get()
+    try:
+        return proc.legal_moves(Position(moves=list(moves)))
+    finally:
+        _PROCESS_POOL.put(proc)
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from project.apps.StockfishApp.stockfishdispatcher import _PROCESS_POOL
+from project.apps.StockfishApp.perft import PERFT_POSITIONS, timed_perft, divide
+from project.apps.StockfishApp.gamestate import Board, Position
+from project.apps.StockfishApp.exceptions import InvalidPositionException
+
+
+class Command(BaseCommand):
+    help = (
+        'Counts the leaf nodes of the legal move tree of the standard perft positions (or --fen) and checks them '
+        'against the known values, reporting nodes/second for the gamestate move generator.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--depth', type=int, default=3, help='perft depth')
+        parser.add_argument('--fen', help='run a single position instead of the standard ones')
+        parser.add_argument('--stockfish', action='store_true', help='also compare each position with stockfish\'s \'go perft\'')
+
+    def handle(self, *args, **options):
+        depth = options['depth']
+        if depth < 1:
+            raise CommandError('--depth must be at least 1')
+
+        if options['fen']:
+            positions = [('fen', options['fen'], [])]
+        else:
+            positions = PERFT_POSITIONS
+
+        failed = False
+        total_nodes, total_seconds = 0, 0.0
+
+        for name, fen, expected_counts in positions:
+            try:
+                nodes, seconds = timed_perft(fen, depth)
+            except InvalidPositionException as err:
+                raise CommandError(str(err))
+
+            total_nodes += nodes
+            total_seconds += seconds
+
+            line = f'{name:<12} depth {depth}: {nodes:>10} nodes {seconds:8.2f}s {nodes / max(seconds, 1e-9):>10.0f} nodes/s'
+
+            if depth <= len(expected_counts):
+                ok = nodes == expected_counts[depth - 1]
+                failed |= not ok
+                line += ' ok' if ok else f' FAILED, expected {expected_counts[depth - 1]}'
+
+            if options['stockfish']:
+                ok = self._compare_with_stockfish(fen, depth)
+                failed |= not ok
+                line += ' stockfish ok' if ok else ' stockfish MISMATCH'
+
+            self.stdout.write(line)
+
+        self.stdout.write(f'total: {total_nodes} nodes {total_seconds:.2f}s {total_nodes / max(total_seconds, 1e-9):.0f} nodes/s')
+
+        if failed:
+            raise CommandError('perft counts don\'t match')
+
+    def _compare_with_stockfish(self, fen, depth):
+        """runs 'go perft' on an engine from the pool, prints the moves whose counts differ, returns True if all match"""
+        proc = _PROCESS_POOL.get()
+        try:
+            expected = proc.perft(Position(fen), depth)
+        finally:
+            _PROCESS_POOL.put(proc)
+
+        got = divide(Board(fen), depth)
+
+        for move in sorted(set(expected) | set(got)):
+            if expected.get(move) != got.get(move):
+                self.stdout.write(f'    {move}: stockfish {expected.get(move)}, gamestate {got.get(move)}')
+
+        return expected == got
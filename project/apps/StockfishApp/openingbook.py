@@ -0,0 +1,126 @@
+import os
+import mmap
+import struct
+import random
+import hashlib
+from .gamestate import encode_move, decode_move
+
+# file layout (all little endian):
+#     header: magic, version, entry count
+#     index:  entry count * (key, data offset), sorted by key so lookups can binary search the memory map
+#     data:   per entry a move count followed by that many (packed move, weight) pairs
+_MAGIC = b'SFBK'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHxxI')
+_INDEX_ENTRY = struct.Struct('<QI')
+_COUNT = struct.Struct('<B')
+_MOVE = struct.Struct('<HH')
+
+_MAX_MOVES_PER_ENTRY = 255
+_MAX_WEIGHT = 0xffff
+
+
+def book_key(difficulty, moves):
+    """returns the 64 bit key for the position reached by playing moves (list of UCI strings) from startpos"""
+    data = f'{int(difficulty)} {" ".join(moves)}'.encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def write_book(path, entries):
+    """
+    writes an opening book file, returns None
+
+    Parameters:
+        path (str): where to write the file, it is replaced atomically so running servers keep their old memory map
+        entries (dict): maps book_key() to a list of (move, weight) tuples, e.g. [('e2e4', 5), ('d2d4', 3)]
+    """
+    keys = sorted(entries)
+    data = bytearray()
+    index = bytearray()
+    data_start = _HEADER.size + _INDEX_ENTRY.size * len(keys)
+
+    for key in keys:
+        moves = sorted(entries[key], key=lambda move: -move[1])[:_MAX_MOVES_PER_ENTRY]
+
+        index += _INDEX_ENTRY.pack(key, data_start + len(data))
+        data += _COUNT.pack(len(moves))
+        for move, weight in moves:
+            data += _MOVE.pack(encode_move(move), min(weight, _MAX_WEIGHT))
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(_HEADER.pack(_MAGIC, _VERSION, len(keys)))
+        file.write(index)
+        file.write(data)
+
+    os.replace(tmp_path, path)
+
+
+class OpeningBook():
+    """read only, memory mapped view of a file made by write_book()"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)  # raises ValueError for empty files
+
+        if len(self._map) < _HEADER.size:
+            self._map.close()
+            raise ValueError(f'{path} is too short to be an opening book')
+
+        magic, version, self._count = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._map.close()
+            raise ValueError(f'{path} is not a version {_VERSION} opening book')
+
+        # a truncated file would make lookups read past the end of the map, so every entry is checked up front
+        index_end = _HEADER.size + self._count * _INDEX_ENTRY.size
+        if len(self._map) < index_end or not self._entries_fit(index_end):
+            self._map.close()
+            raise ValueError(f'{path} is truncated, its entries don\'t fit in the file')
+
+    def _entries_fit(self, index_end):
+        """returns True if the data of every index entry lies inside the map"""
+        size = len(self._map)
+        for _, offset in _INDEX_ENTRY.iter_unpack(self._map[_HEADER.size:index_end]):
+            if offset + _COUNT.size > size or offset + _COUNT.size + self._map[offset] * _MOVE.size > size:
+                return False
+
+        return True
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        """unmaps the file, returns None"""
+        self._map.close()
+
+    def lookup(self, difficulty, moves):
+        """returns list of (move, weight) tuples for the position after moves, or None if it isn't in the book"""
+        key = book_key(difficulty, moves)
+
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            mid_key, offset = _INDEX_ENTRY.unpack_from(self._map, _HEADER.size + mid * _INDEX_ENTRY.size)
+
+            if mid_key < key:
+                low = mid + 1
+            elif mid_key > key:
+                high = mid
+            else:
+                (count,) = _COUNT.unpack_from(self._map, offset)
+                return [
+                    (decode_move(packed), weight)
+                    for packed, weight in _MOVE.iter_unpack(self._map[offset + 1 : offset + 1 + count * _MOVE.size])
+                ]
+
+        return None
+
+    def choose(self, difficulty, moves):
+        """returns a random book move weighted by how often the engine played it, or None if there's no entry"""
+        entry = self.lookup(difficulty, moves)
+        if not entry:
+            return None
+
+        book_moves, weights = zip(*entry)
+        return random.choices(book_moves, weights)[0]
@@ -0,0 +1,40 @@
+import time
+from .gamestate import Board, STARTING_FEN, decode_move
+
+# standard perft test positions (https://www.chessprogramming.org/Perft_Results) with their known leaf node counts,
+# index 0 of the counts is depth 1
+PERFT_POSITIONS = [
+    ('startpos', STARTING_FEN, [20, 400, 8902, 197281, 4865609]),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1', [48, 2039, 97862, 4085603]),
+    ('position 3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1', [14, 191, 2812, 43238, 674624]),
+    ('position 4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1', [6, 264, 9467, 422333]),
+    ('position 5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8', [44, 1486, 62379, 2103487]),
+    ('position 6', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10', [46, 2079, 89890, 3894594]),
+]
+
+
+def perft(board, depth):
+    """returns the number of leaf nodes of the legal move tree of board to depth"""
+    if depth == 0:
+        return 1
+
+    moves = board.legal_moves()
+    if depth == 1:
+        return len(moves)  # leaves don't need to be played, only counted
+
+    return sum(perft(board.apply(move), depth - 1) for move in moves)
+
+
+def divide(board, depth):
+    """returns dict mapping each legal move (UCI string) to its perft count at depth - 1, like stockfish's 'go perft'"""
+    return {decode_move(move): perft(board.apply(move), depth - 1) for move in board.legal_moves()}
+
+
+def timed_perft(fen, depth):
+    """runs perft on fen, returns (leaf nodes, seconds taken)"""
+    board = Board(fen)
+
+    start = time.perf_counter()
+    nodes = perft(board, depth)
+
+    return nodes, time.perf_counter() - start
@@ -0,0 +1,81 @@
+import re
+from .gamestate import Board, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, STARTING_FEN, decode_move
+from .exceptions import IllegalMoveException
+
+_TAG_REGEX = re.compile(r'^\s*\[(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]\s*$', re.MULTILINE)
+_COMMENT_REGEX = re.compile(r'\{[^}]*\}|;[^\n]*')
+_VARIATION_REGEX = re.compile(r'\([^()]*\)')  # innermost variation, removed repeatedly to handle nesting
+_NAG_REGEX = re.compile(r'\$\d+')
+_MOVE_NUMBER_REGEX = re.compile(r'\d+\.(\.\.)?')
+_RESULTS = {'1-0', '0-1', '1/2-1/2', '*'}
+
+_CASTLE_REGEX = re.compile(r'(O-O-O|0-0-0|O-O|0-0)[+#]?[!?]*')
+_SAN_REGEX = re.compile(r'([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?[+#]?[!?]*')
+_SAN_PIECES = {None: PAWN, 'N': KNIGHT, 'B': BISHOP, 'R': ROOK, 'Q': QUEEN, 'K': KING}
+
+_FILES = 'abcdefgh'
+
+
+def san_to_move(board, san):
+    """returns the packed move (see gamestate.encode_move) for a move in standard algebraic notation, e.g. 'Nbd7'"""
+    legal_moves = board.legal_moves()
+
+    if castle := _CASTLE_REGEX.fullmatch(san):
+        king_sq = board.king_square(board.turn)
+        to_sq = king_sq - 2 if castle.group(1) in ('O-O-O', '0-0-0') else king_sq + 2
+        candidates = [move for move in legal_moves if move == king_sq | (to_sq << 6)]
+
+    elif match := _SAN_REGEX.fullmatch(san):
+        piece, from_file, from_rank, to_square, promotion = match.groups()
+        piece_type = _SAN_PIECES[piece]
+        to_sq = _FILES.index(to_square[0]) + (int(to_square[1]) - 1) * 8
+        promotion_type = _SAN_PIECES[promotion] if promotion else 0
+
+        candidates = [
+            move for move in legal_moves
+            if (move >> 6) & 0x3f == to_sq
+            and move >> 12 == promotion_type
+            and board.piece_at(move & 0x3f)[1] == piece_type
+            and (from_file is None or (move & 0x3f) % 8 == _FILES.index(from_file))
+            and (from_rank is None or (move & 0x3f) // 8 == int(from_rank) - 1)
+        ]
+
+    else:
+        raise IllegalMoveException(f'Illegal move {san!r}, not a SAN move')
+
+    if len(candidates) != 1:
+        reason = 'ambiguous' if candidates else 'not legal'
+        raise IllegalMoveException(f'Illegal move {san!r} in position {board.fen()}, {reason}')
+
+    return candidates[0]
+
+
+def parse_pgn(text):
+    """
+    reads the first game of a PGN, returns (fenstring, list of UCI move strings)
+
+    fenstring is '' when the game starts from the normal starting position. comments, variations and annotations are
+    ignored, raises IllegalMoveException if a move can't be played
+    """
+    tags = dict(_TAG_REGEX.findall(text))
+    movetext = _TAG_REGEX.sub('', text)
+
+    movetext = _COMMENT_REGEX.sub(' ', movetext)
+    while (stripped := _VARIATION_REGEX.sub(' ', movetext)) != movetext:
+        movetext = stripped
+    movetext = _NAG_REGEX.sub(' ', movetext)
+    movetext = _MOVE_NUMBER_REGEX.sub(' ', movetext)
+
+    fenstring = tags.get('FEN', '')
+    board = Board(fenstring or STARTING_FEN)
+    moves = []
+
+    for token in movetext.split():
+        if token in _RESULTS:
+            break  # only the first game is read
+
+        move = san_to_move(board, token)
+        moves.append(decode_move(move))
+        board = board.apply(move)
+
+    return fenstring, moves
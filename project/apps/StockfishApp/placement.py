@@ -0,0 +1,109 @@
+import os
+import glob
+from itertools import zip_longest
+
+_NUMA_NODE_GLOB = '/sys/devices/system/node/node*/cpulist'
+
+# address space an engine needs on top of its hash table: the binary and the nnue network, plus for every search
+# thread an 8 MB stack and the 64 MB malloc arena glibc usually gives it. RLIMIT_AS counts reserved address space,
+# not memory in use, so these are reservation sizes
+_MEMORY_BASE_MB = 512
+_MEMORY_PER_THREAD_MB = 8 + 64
+
+
+def memory_limit(threads, hash_mb):
+    """returns the bytes of address space an engine with threads search threads and a hash_mb hash table needs"""
+    return (_MEMORY_BASE_MB + threads * _MEMORY_PER_THREAD_MB + hash_mb) * 1024 * 1024
+
+
+def _parse_cpulist(text):
+    """returns list of cpus in a linux cpulist string, e.g. '0-3,8' -> [0, 1, 2, 3, 8]"""
+    cpus = []
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus.extend(range(int(first), int(last or first) + 1))
+
+    return cpus
+
+
+def available_cpus():
+    """returns sorted list of the cpus this process may run on, or None if the platform can't pin processes to cpus"""
+    if not hasattr(os, 'sched_getaffinity'):
+        return None
+
+    return sorted(os.sched_getaffinity(0))
+
+
+def numa_nodes():
+    """returns list of lists of the cpus on each NUMA node, or None if the platform doesn't say"""
+    nodes = []
+    for path in sorted(glob.glob(_NUMA_NODE_GLOB)):
+        with open(path) as f:
+            if cpus := _parse_cpulist(f.read()):
+                nodes.append(cpus)
+
+    return nodes or None
+
+
+def plan_engines(count, threads=1, hash_mb=16, nice=None, reserved_cpus=1, cpus=None, nodes=None):
+    """
+    returns list of StockfishProcess config dicts, one per engine, so the engines never need more cores than there are
+
+    every engine gets threads cpus of its own, taken from a single NUMA node when one has enough, and engines are
+    spread across the nodes in turn. reserved_cpus are left free for the web server. when there aren't enough cpus
+    for count engines fewer configs are returned. each config has 'threads', 'hash' and a 'memory_limit' that fits
+    the hash table and the threads, plus 'cpus' if the platform can pin processes and 'nice' if nice is given
+
+    Parameters:
+        count (int): most engines to plan for
+        threads (int): search threads per engine
+        hash_mb (int): hash table size per engine in MB
+        nice (int): niceness for the engines, None leaves it as it is
+        reserved_cpus (int): cpus no engine runs on, unless that would leave no room for a single engine
+        cpus (list): cpus to use, defaults to available_cpus()
+        nodes (list): lists of cpus on each NUMA node, defaults to numa_nodes()
+    """
+    if cpus is None:
+        cpus = available_cpus()
+
+    # without affinity support the os places the engines, but the thread count still has to fit the machine
+    pin = cpus is not None
+    if not pin:
+        cpus = list(range(os.cpu_count() or 1))
+
+    usable = cpus[reserved_cpus:] if len(cpus) - reserved_cpus >= threads else cpus
+    threads = min(threads, len(usable))
+
+    if nodes is None:
+        nodes = numa_nodes() or [usable]
+
+    # split each node's usable cpus into groups of threads, leftovers smaller than a group aren't used
+    usable_set = set(usable)
+    groups_by_node = []
+    for node in nodes:
+        node = [cpu for cpu in node if cpu in usable_set]
+        groups_by_node.append([node[ind:ind + threads] for ind in range(0, len(node) - threads + 1, threads)])
+
+    groups = [group for batch in zip_longest(*groups_by_node) for group in batch if group]
+
+    # no single node has enough cpus for an engine, so engines have to span nodes
+    if not groups:
+        groups = [usable[ind:ind + threads] for ind in range(0, len(usable) - threads + 1, threads)]
+
+    configs = []
+    for group in groups[:count]:
+        config = {
+            'threads': threads,
+            'hash': hash_mb,
+            'memory_limit': memory_limit(threads, hash_mb),
+        }
+        if pin:
+            config['cpus'] = group
+        if nice is not None:
+            config['nice'] = nice
+
+        configs.append(config)
+
+    return configs
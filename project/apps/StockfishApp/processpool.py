@@ -0,0 +1,45 @@
+import threading
+
+
+class ProcessPool():
+    """
+    pool of idle StockfishProcess objects grouped into sub-pools by the difficulty each process is configured for
+
+    get() hands out a process that is already set up for the requested difficulty when one is idle, so the caller
+    doesn't have to send any setoption commands. when that sub-pool is empty a process is borrowed from the biggest
+    other sub-pool and the caller reconfigures it
+    """
+
+    def __init__(self):
+        self._idle = {}  # maps difficulty to list of idle processes
+        self._idle_count = 0
+        self._cond = threading.Condition()
+
+    def put(self, proc):
+        """returns proc to the sub-pool for the difficulty it is currently configured for, returns None"""
+        with self._cond:
+            self._idle.setdefault(proc.difficulty, []).append(proc)
+            self._idle_count += 1
+            self._cond.notify()
+
+    def get(self, difficulty=None):
+        """blocks until a process is idle, returns one configured for difficulty if possible"""
+        with self._cond:
+            while not self._idle_count:
+                self._cond.wait()
+
+            procs = self._idle.get(difficulty)
+            if not procs:
+                procs = max(self._idle.values(), key=len)
+
+            self._idle_count -= 1
+            return procs.pop()
+
+    def qsize(self):
+        """returns the number of idle processes"""
+        return self._idle_count
+
+    def idle_by_difficulty(self):
+        """returns dict mapping each difficulty to its number of idle processes"""
+        with self._cond:
+            return {difficulty: len(procs) for difficulty, procs in self._idle.items() if procs}
@@ -0,0 +1,133 @@
+import sys
+import time
+import uuid
+import threading
+from array import array
+from collections import OrderedDict
+from .gamestate import Position, STARTING_FEN, encode_move, decode_move
+
+_DEFAULT_MAX_IDLE_SECONDS = 30 * 60
+_DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# rough fixed cost of a session on top of its move array: the GameSession object, the game id string
+# and the OrderedDict entry
+_SESSION_OVERHEAD_BYTES = 300
+
+
+class GameSession():
+    """
+    move history of one game, 2 bytes per move
+
+    fenstring is the position the game started from, '' for the normal starting position with white to move. the
+    client lets the player move first with either color, so a game can also start from the starting position with
+    black to move
+    """
+
+    __slots__ = ('game_id', 'difficulty', 'fenstring', 'last_access', '_moves')
+
+    def __init__(self, game_id, difficulty, fenstring=''):
+        self.game_id = game_id
+        self.difficulty = difficulty
+        # stored as '' for the normal start so the engine gets 'startpos' and the opening book can be used,
+        # the move counters are left out of the comparison since the client starts its fullmove number at 0
+        self.fenstring = '' if fenstring.split()[:4] == STARTING_FEN.split()[:4] else fenstring
+        self.last_access = time.monotonic()
+        self._moves = array('H')
+
+    def __len__(self):
+        return len(self._moves)
+
+    def push(self, move):
+        """appends a UCI move string to the history, returns None"""
+        self._moves.append(encode_move(move))
+
+    @property
+    def moves(self):
+        """list of UCI move strings played so far"""
+        return [decode_move(packed) for packed in self._moves]
+
+    def position(self):
+        """returns a gamestate.Position with the whole history, so the engine can see repetitions and the 50 move rule"""
+        return Position(self.fenstring, self.moves)
+
+
+def _session_bytes(session):
+    """returns the estimated memory used by session"""
+    return _SESSION_OVERHEAD_BYTES + sys.getsizeof(session.fenstring) + sys.getsizeof(session._moves)
+
+
+class SessionStore():
+    """
+    thread safe in memory store of GameSessions keyed by game id
+
+    sessions that haven't been used for max_idle_seconds are evicted, and when the estimated memory use goes over
+    max_bytes the least recently used sessions are evicted until it fits again
+    """
+
+    def __init__(self, max_idle_seconds=_DEFAULT_MAX_IDLE_SECONDS, max_bytes=_DEFAULT_MAX_BYTES):
+        self._max_idle_seconds = max_idle_seconds
+        self._max_bytes = max_bytes
+
+        self._sessions = OrderedDict()  # least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    @property
+    def bytes_used(self):
+        """estimated memory used by the stored sessions"""
+        return self._bytes
+
+    def create(self, difficulty, fenstring=''):
+        """starts a new session for a game starting from fenstring ('' for the starting position), returns GameSession"""
+        session = GameSession(uuid.uuid4().hex, difficulty, fenstring)
+
+        with self._lock:
+            self._sessions[session.game_id] = session
+            self._bytes += _session_bytes(session)
+            self._evict()
+
+        return session
+
+    def get(self, game_id):
+        """returns the GameSession for game_id, or None if it doesn't exist or was evicted"""
+        with self._lock:
+            self._evict()
+
+            session = self._sessions.get(game_id)
+            if session is not None:
+                session.last_access = time.monotonic()
+                self._sessions.move_to_end(game_id)
+
+        return session
+
+    def push_moves(self, session, *moves):
+        """appends moves to session and updates the memory estimate, returns None"""
+        with self._lock:
+            size = sys.getsizeof(session._moves)
+            for move in moves:
+                session.push(move)
+            self._bytes += sys.getsizeof(session._moves) - size
+
+            session.last_access = time.monotonic()
+
+    def delete(self, game_id):
+        """removes the session for game_id if it exists, returns None"""
+        with self._lock:
+            session = self._sessions.pop(game_id, None)
+            if session is not None:
+                self._bytes -= _session_bytes(session)
+
+    def _evict(self):
+        """evicts idle sessions and then least recently used ones until under the memory cap, lock must be held"""
+        cutoff = time.monotonic() - self._max_idle_seconds
+
+        while self._sessions:
+            game_id, session = next(iter(self._sessions.items()))
+            if session.last_access > cutoff and self._bytes <= self._max_bytes:
+                break
+
+            del self._sessions[game_id]
+            self._bytes -= _session_bytes(session)
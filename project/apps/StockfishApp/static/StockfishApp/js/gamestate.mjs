@@ -1,4 +1,4 @@
-import { getStockfishNextMove } from './stockfish.mjs';
+import { startGame, getStockfishNextMove } from './stockfish.mjs';
 import { Pawn, Rook, Bishop, Knight, Queen, King, EnPassant, SightLinePiece } from './pieces.mjs';
 import { movePiece, endGame } from './gui.mjs';
 import { makeBoardUnclickable, makeBoardClickable } from './gui.mjs';
@@ -32,6 +32,14 @@ const PROMOTION_STRING_MAP = {
     'b': Bishop,
 }
 
+// maps piece class name to the promotion letter of a UCI move string
+const PROMOTION_CLASS_TO_STRING = {
+    'Queen': 'q',
+    'Rook': 'r',
+    'Knight': 'n',
+    'Bishop': 'b',
+};
+
 class Game{
     constructor(board){
         this._board = board;
@@ -45,6 +53,9 @@ class Game{
         this._moveCount = 0;
         this._halfMoveClock = 0;
 
+        // id of the server side session that holds the move history, set when the first move is sent
+        this._gameId = null;
+
         this._check = {
             'black': false,
             'white': false,
@@ -73,6 +84,9 @@ class Game{
         if(!this.isValidMove(move)) return false;
 
         if(move.pieceMoved.color === this._playerColor){
+            // the position before the player's first move, the server needs it to know which color moves first
+            let startFen = (this._gameId === null) ? this.toFenString() : null;
+
             this._playerUpdate(move);
 
             makeBoardUnclickable();
@@ -80,8 +94,22 @@ class Game{
             if(this._endGameCheck()) return;
 
             // get stockfish move from server
+            if(this._gameId === null)
+                this._gameId = await startGame(this._difficulty, startFen);
+
             let fen = this.toFenString();
-            let stockfishMoveStr = await getStockfishNextMove(this._difficulty, fen);
+            let stockfishMoveStr;
+            try {
+                stockfishMoveStr = await getStockfishNextMove(this._difficulty, fen, this._gameId, this.convertMoveToMoveStr(move), this._moveCount);
+            } catch(error) {
+                // a cancelled request belongs to a game the player has left, anything else means the server
+                // couldn't answer even after retrying
+                if(error.name !== 'AbortError') console.error(error);
+                return false;
+            }
+
+            // server found stockfish has no legal moves, the board stays unclickable
+            if(stockfishMoveStr === null) return true;
             let stockfishMove = this.convertMoveStrToMove(stockfishMoveStr)
 
             this._stockfishUpdate( stockfishMove );
@@ -269,6 +297,15 @@ class Game{
         return (move.pieceMoved.color === this._colorToMove) && (this._board.isValidMove(move));
     }
 
+    convertMoveToMoveStr(move){
+        let moveStr = `${move.oldSquare}${move.newSquare}`;
+
+        if(move.promotion)
+            moveStr += PROMOTION_CLASS_TO_STRING[ move.promotion.name ];
+
+        return moveStr;
+    }
+
     convertMoveStrToMove(moveStr){
         const oldSquare = moveStr.substring(0, 2);
         const newSquare = moveStr.substring(2, 4);
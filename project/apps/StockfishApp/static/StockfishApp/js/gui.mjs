@@ -37,6 +37,12 @@ let offY;
 
 let GAME;
 
+// the promotion dialogues have an image of every piece a pawn can promote to, their src is reused for promoted pawns
+// so it points at the separate svg files or the sprite, whichever the page was rendered with
+function getPromotionSrc(color, promotion){
+    return document.querySelector(`#piece-select-dialogue-${color} .${PIECE_CLASS_TO_LINK[ promotion.name ]}-button img`).getAttribute('src');
+}
+
 function addBoardListeners(game){
 
     GAME = game;
@@ -169,8 +175,7 @@ async function _drop(event){
 
             let color = dragged.getAttribute('class').split(' ')[1];
 
-            let svgLink = `/static/StockfishApp/assets/pieces/${color}/${PIECE_CLASS_TO_LINK[ move.promotion.name ]}.svg`;
-            dragged.setAttribute('src', svgLink);
+            dragged.setAttribute('src', getPromotionSrc(color, move.promotion));
 
         }
 
@@ -360,9 +365,8 @@ function movePiece(move){
 
     if(move.promotion){
         const color = move.pieceMoved.color;
-        const svgLink = `/static/StockfishApp/assets/pieces/${color}/${PIECE_CLASS_TO_LINK[ move.promotion.name ]}.svg`;
 
-        piece.setAttribute('src', svgLink);
+        piece.setAttribute('src', getPromotionSrc(color, move.promotion));
     }
 
     // if capture, move piece in new square to document.querySelector('#captured-container');
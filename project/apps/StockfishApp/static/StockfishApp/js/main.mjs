@@ -1,6 +1,7 @@
 import { createBoardState, Board } from './board.mjs';
 import { addBoardListeners, getGameSettings } from './gui.mjs';
 import { Game } from './gamestate.mjs';
+import { cancelPendingMove } from './stockfish.mjs';
 
 let boardState = createBoardState();
 
@@ -12,3 +13,6 @@ addBoardListeners(game);
 
 // GUI window for getting player settings
 getGameSettings();
+
+// stop the engine searching for a move nobody will see when the page is closed or reloaded
+window.addEventListener('pagehide', cancelPendingMove);
@@ -20,31 +20,128 @@ function getCookie(name) {
 const csrftoken = getCookie('csrftoken');
 
 
-// send ajax request to server and return Stockfish's bestmove response
-async function getStockfishNextMove(difficulty, fen) {
-    let nextmove;
+// move requests that fail with a network or server error are retried up to MAX_RETRIES times with a growing delay
+// there's deliberately no timeout: a slow answer means the request is queued behind others on the server, and
+// sending it again would only put it at the back of the queue
+const MAX_RETRIES = 2;
+const RETRY_DELAY_MS = 500;
+
+// the move request waiting on the server, only one is needed at a time so starting another one cancels it
+let pendingMove = null;
+
 
-    let response = await fetch(`${baseUrl}get_move/`, {
+function postJson(path, body, signal=null, keepalive=false) {
+    return fetch(`${baseUrl}${path}`, {
         method: 'POST',
         headers: {
             'X-REQUESTED-WITH': 'XMLHttpRequest',
             'X-CSRFToken': csrftoken,
             'Content-Type': 'text/json'
         },
-        body: JSON.stringify({
-            'difficulty': difficulty,
-            'fen': fen,
-        }),
+        body: JSON.stringify(body),
+        signal: signal,
+        keepalive: keepalive,  // lets the request finish while the page unloads
     });
-    
+}
+
+function newRequestId() {
+    // crypto.randomUUID is only available on https and localhost
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}-${Math.random().toString(36).slice(2)}`;
+}
+
+function abortError(message) {
+    return new DOMException(message, 'AbortError');
+}
+
+// tells the server to stop the engine searching for a request the client has given up on
+function cancelOnServer(requestId) {
+    postJson('cancel_move/', {'request_id': requestId}, null, true).catch(() => {});
+}
+
+// start a game on the server so it can keep the move history, returns the game id
+// fen is the position before the first move, which tells the server who moves first
+async function startGame(difficulty, fen) {
+    let response = await postJson('new_game/', {
+        'difficulty': difficulty,
+        'fen': fen,
+    });
+
     let json = await response.json();
 
-    nextmove = json.nextmove;
+    return json.game_id;
+}
+
+// aborts the move request waiting on the server, if there is one, and stops the engine working on it
+// getStockfishNextMove() then rejects with an AbortError
+function cancelPendingMove() {
+    if (pendingMove === null) return;
+
+    const move = pendingMove;
+    pendingMove = null;
 
-    console.log(json);
+    move.cancelled = true;
+    move.controller.abort();
+    cancelOnServer(move.requestId);
+}
+
+// send ajax request to server and return Stockfish's bestmove response
+// if gameId is given the server plays from the game's move history, with move (e.g. 'e2e4') as the player's latest move
+// and ply as the number of moves played including it, so a retried request doesn't add the move twice
+// a request that fails with a network or server error is retried,
+// any previous request still waiting is cancelled since its answer is stale
+async function getStockfishNextMove(difficulty, fen, gameId=null, move=null, ply=null) {
+    cancelPendingMove();
+
+    const pending = {cancelled: false, controller: null, requestId: null};
+    pendingMove = pending;
+
+    try {
+        for (let attempt = 0; ; attempt++) {
+            pending.controller = new AbortController();
+            pending.requestId = newRequestId();
+
+            let error;
+            try {
+                let response = await postJson('get_move/', {
+                    'difficulty': difficulty,
+                    'fen': fen,
+                    'request_id': pending.requestId,
+                    ...(gameId && {'game_id': gameId, 'move': move, 'ply': ply}),
+                }, pending.controller.signal);
+
+                if (response.ok) {
+                    let json = await response.json();
+
+                    if (json.cancelled) throw abortError('move request was cancelled on the server');
+
+                    return json.nextmove;
+                }
 
-    return nextmove;
+                // the request itself is wrong, sending it again won't help
+                if (response.status < 500) throw new Error(`move request failed: ${response.status} ${await response.text()}`);
+
+                error = new Error(`move request failed: ${response.status}`);
+            } catch (err) {
+                // only network errors (fetch rejects with a TypeError) are worth retrying, aborts mean it was cancelled
+                if (pending.cancelled || !(err instanceof TypeError)) throw err;
+
+                error = err;
+            }
+
+            if (attempt >= MAX_RETRIES) throw error;
+
+            // the failed request may still have reached the server, don't let it hold an engine
+            cancelOnServer(pending.requestId);
+
+            await new Promise(resolve => setTimeout(resolve, RETRY_DELAY_MS * 2 ** attempt));
+            if (pending.cancelled) throw abortError('move request was cancelled');
+        }
+    } finally {
+        if (pendingMove === pending) pendingMove = null;
+    }
 }
 
 
-export { getStockfishNextMove };
+export { startGame, getStockfishNextMove, cancelPendingMove };
@@ -1,23 +1,87 @@
 # TODO: add graceful error handling for failed threads/processes, implement timeouts to catch process hanging on read
 # TODO: write tests for this module
 
+import math
 import time
 import queue
 import threading
 import logging
 from .stockfishprocess import StockfishProcess
-from .consts import STOCKFISH_PATH
+from .processpool import ProcessPool
+from .openingbook import OpeningBook
+from .depthcontroller import DepthController
+from .placement import plan_engines
+from .gamestate import STARTING_FEN
+from .consts import STOCKFISH_PATH, OPENING_BOOK_PATH
 
 _MAX_PROCESS_COUNT = 10
 
+# every engine gets _ENGINE_THREADS cores to itself (on one NUMA node where possible) after _RESERVED_CPUS are left
+# for the web server, machines without enough cores start fewer than _MAX_PROCESS_COUNT engines instead of
+# running more search threads than there are cores. the engines run at _ENGINE_NICE so searches yield to page loads
+_ENGINE_THREADS = 1
+_ENGINE_HASH_MB = 16
+_ENGINE_NICE = 5
+_RESERVED_CPUS = 1
+
+# how many processes start out pre-configured for each difficulty, any remaining processes use the default difficulty
+# set to {} to start every process at the default difficulty
+_POOL_DIFFICULTIES = {1: 2, 2: 2, 3: 2, 4: 2, 5: 2}
+
+# (min depth, max depth) for each difficulty, searches drop towards min depth when the pool can't keep up
+# lower difficulties can drop further because the player can't tell the difference
+_DEPTH_LIMITS = {1: (4, 10), 2: (5, 10), 3: (6, 10), 4: (8, 10), 5: (9, 10)}
+
+# searches taking longer than this on average count as load even if the queue is short
+_TARGET_SEARCH_SECONDS = 0.5
+
+# most engines a single game review can take from the pool, so reviews don't starve games being played
+_REVIEW_MAX_PROCESSES = 4
+
+# share of the pool all reviews together can use, at least one engine so reviews still run on the smallest hosts
+_REVIEW_POOL_SHARE = 0.5
+
 _INPUTS = queue.Queue()
 
-_PROCESS_POOL = queue.Queue(_MAX_PROCESS_COUNT)
-for _ in range(_MAX_PROCESS_COUNT):
-    _PROCESS_POOL.put(StockfishProcess(STOCKFISH_PATH))
+_ENGINE_CONFIGS = plan_engines(_MAX_PROCESS_COUNT, _ENGINE_THREADS, _ENGINE_HASH_MB, _ENGINE_NICE, _RESERVED_CPUS)
+_PROCESS_COUNT = len(_ENGINE_CONFIGS)
+
+_DEPTH_CONTROLLER = DepthController(_DEPTH_LIMITS, _PROCESS_COUNT, _TARGET_SEARCH_SECONDS)
+
+# every review chunk holds one of these while it has an engine, so concurrent reviews can't take the whole pool.
+# at least one engine is always left for games, except with a single engine where reviews and games have to share it
+_REVIEW_ENGINE_LIMIT = max(1, min(int(_PROCESS_COUNT * _REVIEW_POOL_SHARE), _PROCESS_COUNT - 1))
+_REVIEW_SLOTS = threading.BoundedSemaphore(_REVIEW_ENGINE_LIMIT)
+_review_engines = 0  # engines currently analyzing for reviews, guarded by _LOCK
 
-_RETURN_VALUES = {}  # maps Position objects to return values from get_next_move
-                     # use hash() on each Position to get a unique key for each position
+_PROCESS_POOL = ProcessPool()
+
+# difficulties are handed out in turn so every difficulty gets an engine before any gets a second one, which
+# matters when plan_engines() starts fewer engines than _POOL_DIFFICULTIES asks for
+_difficulties = [
+    lvl for rnd in range(max(_POOL_DIFFICULTIES.values(), default=0))
+    for lvl, count in _POOL_DIFFICULTIES.items() if rnd < count
+]
+for ind, config in enumerate(_ENGINE_CONFIGS):
+    if ind < len(_difficulties):
+        config['difficulty'] = _difficulties[ind]
+    _PROCESS_POOL.put(StockfishProcess(STOCKFISH_PATH, config))
+logging.info(f'STARTED {_PROCESS_COUNT} STOCKFISH PROCESSES: {_ENGINE_CONFIGS}')
+
+# precomputed engine moves for the first plies of a game, opening the file maps it and checks its index
+try:
+    _BOOK = OpeningBook(OPENING_BOOK_PATH)
+    logging.info(f'LOADED OPENING BOOK WITH {len(_BOOK)} POSITIONS')
+except (FileNotFoundError, ValueError) as err:
+    _BOOK = None
+    logging.info(f'NO OPENING BOOK LOADED: {err}')
+
+_RETURN_VALUES = {}  # maps request ids to queues that get the return value of get_next_move
+
+# cancel() can come from another request thread at any point in a request's life, _LOCK guards these and _RETURN_VALUES
+_LOCK = threading.Lock()
+_CANCELLED = set()  # ids of cancelled requests that haven't finished yet
+_SEARCHING = {}  # maps request id to the StockfishProcess searching for it
 
 
 # run() continuously loops in its' own daemon thread started in the apps.py AppConfig.ready() method
@@ -25,47 +89,216 @@ def run():
     """continuously runs in background on server, dispatches inputs to handler function"""
     while True:
         req = _INPUTS.get()
-        proc = _PROCESS_POOL.get()
+
+        # requests cancelled while they were queued don't take an engine from the pool
+        if _is_cancelled(req['request_id']):
+            _RETURN_VALUES[req['request_id']].put(None)
+            continue
+
+        proc = _PROCESS_POOL.get(req['difficulty'])
+        depth = _DEPTH_CONTROLLER.depth_for(req['difficulty'], _INPUTS.qsize())
 
         threading.Thread(
             target=_input_handler,
-            args=(proc, req),
+            args=(proc, req, depth),
             daemon=True
         ).start()
 
         # time.sleep(5)  # for debugging purposes
 
 
-def _input_handler(proc, req):
+def _is_cancelled(request_id):
+    with _LOCK:
+        return request_id in _CANCELLED
+
+
+def _input_handler(proc, req, depth):
     """
-    runs get_next_move method on proc
-    outputs return value to _RETURN_VAUES with unique key so that it can be retrieved
+    runs get_next_move method on proc at depth, reports how long the search took to _DEPTH_CONTROLLER
+    outputs return value to _RETURN_VAUES with unique key so that it can be retrieved, or None if req was cancelled
     """
     # by the time execution gets here proc and pos should be guaranteed to be accessible to one thread only
+    # set_difficulty() only sends setoption if proc came from another difficulty's sub-pool,
+    # and get_next_move() covers both commands with a single 'isready'
     proc.new_game()
     proc.set_difficulty(req['difficulty'])
-    next_move = proc.get_next_move(req['fen'])
+
+    # from here on cancel() can stop the search, the check and registration happen together so it can't be missed
+    with _LOCK:
+        cancelled = req['request_id'] in _CANCELLED
+        if not cancelled:
+            _SEARCHING[req['request_id']] = proc
+
+    next_move = None
+    if not cancelled:
+        start = time.monotonic()
+        next_move = proc.get_next_move(req['fen'], depth)
+        seconds = time.monotonic() - start
+
+        with _LOCK:
+            del _SEARCHING[req['request_id']]
+            cancelled = req['request_id'] in _CANCELLED
+
+        if cancelled:
+            next_move = None  # the search was cut short, nobody is waiting for its move
+        else:
+            _DEPTH_CONTROLLER.record(seconds)
+
     _PROCESS_POOL.put(proc)
-    _RETURN_VALUES[hash(req['fen'])].put(next_move)
+    _RETURN_VALUES[req['request_id']].put(next_move)
 
     return  # thread ends when function returns
 
 
+def _book_move(req):
+    """returns a move from the opening book for req, or None if the book doesn't cover the position"""
+    pos = req['fen']
+
+    # the book is keyed by the moves played from the starting position
+    if _BOOK is None or pos.position not in ('startpos', f'fen {STARTING_FEN}'):
+        return None
+
+    moves = pos.moves.split()[1:] if pos.moves else []
+    return _BOOK.choose(req['difficulty'], moves)
+
+
 def get_next_move(req):
     """
     takes Position and puts it in _INPUTS queue where it will be handled in the run() function
 
     Parameters:
-        pos (Position): position for stockfish process to calculate next move
-
+        req (dict): 'difficulty' (int), 'fen' (Position) for stockfish process to calculate next move, and
+            'request_id' (str) that cancel() can refer to it by
     Returns:
-        next_move (str): the 'bestmove' output of the stockfish process (e.g. 'e2e4')
+        next_move (str): the 'bestmove' output of the stockfish process (e.g. 'e2e4'), or None if it was cancelled
+    Raises:
+        ValueError: if another request with the same request_id hasn't finished
     """
-    _RETURN_VALUES[hash(req['fen'])] = queue.Queue(1)
+    if (next_move := _book_move(req)) is not None:
+        logging.info(f'next_move: {next_move} (opening book)')
+        return next_move
+
+    request_id = req['request_id']
+    with _LOCK:
+        if request_id in _RETURN_VALUES:
+            raise ValueError(f'request {request_id!r} is already in progress')
+        _RETURN_VALUES[request_id] = queue.Queue(1)
+
     _INPUTS.put(req)
-    next_move = _RETURN_VALUES[hash(req['fen'])].get()
-    del _RETURN_VALUES[hash(req['fen'])]
+    next_move = _RETURN_VALUES[request_id].get()
+
+    with _LOCK:
+        del _RETURN_VALUES[request_id]
+        _CANCELLED.discard(request_id)
 
     logging.info(f'next_move: {next_move}\n_RETURN_VALUES: {_RETURN_VALUES}')
 
     return next_move
+
+
+def cancel(request_id):
+    """
+    cancels a request passed to get_next_move(), returns True if it hadn't finished yet, otherwise False
+
+    a request still in _INPUTS is skipped when run() gets to it, a request being searched has its engine told to
+    stop, which makes the engine answer straight away and go back to _PROCESS_POOL
+    """
+    with _LOCK:
+        if request_id not in _RETURN_VALUES:
+            return False
+
+        _CANCELLED.add(request_id)
+        if (proc := _SEARCHING.get(request_id)) is not None:
+            proc.stop()
+
+    return True
+
+
+def _analyze_chunk(positions, indexes, depth, results, cancelled):
+    """
+    analyzes positions[ind] for each ind in indexes on one engine, puts (ind, analysis) in results
+
+    stops between positions once the cancelled event is set
+    """
+    global _review_engines
+
+    _REVIEW_SLOTS.acquire()
+    if cancelled.is_set():
+        _REVIEW_SLOTS.release()
+        return
+
+    proc = _PROCESS_POOL.get(5)
+    with _LOCK:
+        _review_engines += 1
+
+    try:
+        # reviews always use full strength, and there's no ucinewgame between positions so the engine's hash
+        # carries over from one position of the game to the next
+        proc.new_game()
+        proc.set_difficulty(5)
+        for ind in indexes:
+            if cancelled.is_set():
+                break
+            results.put((ind, proc.analyse(positions[ind], depth)))
+    except Exception as err:
+        results.put((None, err))
+    finally:
+        with _LOCK:
+            _review_engines -= 1
+        _PROCESS_POOL.put(proc)
+        _REVIEW_SLOTS.release()
+
+
+def analyze_positions(positions, depth=None):
+    """
+    analyzes positions in parallel on up to _REVIEW_MAX_PROCESSES engines, yields (index, analysis) as each finishes
+
+    all reviews together use at most _REVIEW_ENGINE_LIMIT engines, chunks wait for a free slot beyond that. closing
+    the generator (e.g. the client disconnecting from a streamed review) cancels the positions not yet analyzed
+
+    positions are consecutive positions of one game and are split into contiguous chunks, one engine per chunk.
+    each chunk is searched from its last position backwards, so what the engine learns about later positions is
+    already in its hash when it gets to the earlier ones
+
+    Parameters:
+        positions (list): gamestate.Position objects
+        depth (int): search depth, defaults to the engine config depth
+    Returns:
+        generator of (int, dict): index into positions and the StockfishProcess.analyse() output
+    """
+    results = queue.Queue()
+    cancelled = threading.Event()
+    chunk_size = max(math.ceil(len(positions) / _REVIEW_MAX_PROCESSES), 1)
+
+    for start in range(0, len(positions), chunk_size):
+        threading.Thread(
+            target=_analyze_chunk,
+            args=(
+                positions, range(min(start + chunk_size, len(positions)) - 1, start - 1, -1), depth, results, cancelled
+            ),
+            daemon=True
+        ).start()
+
+    try:
+        for _ in range(len(positions)):
+            ind, analysis = results.get()
+            if ind is None:
+                raise analysis
+
+            yield ind, analysis
+    finally:
+        cancelled.set()
+
+
+def get_metrics():
+    """returns dict describing the dispatcher's load and the depths it is currently searching at"""
+    return {
+        'queued_requests': _INPUTS.qsize(),
+        'searching_requests': len(_SEARCHING),
+        'processes': _PROCESS_COUNT,
+        'review_engines': _review_engines,
+        'review_engine_limit': _REVIEW_ENGINE_LIMIT,
+        'idle_processes': _PROCESS_POOL.qsize(),
+        'idle_processes_by_difficulty': _PROCESS_POOL.idle_by_difficulty(),
+        **_DEPTH_CONTROLLER.metrics(),
+    }
@@ -5,7 +5,15 @@ import sys
 import pathlib
 import errno
 import warnings
+import threading
 import logging
+from .uciprotocol import UCIReader, parse_bestmove, parse_info
+
+# resource only exists on unix, without it memory_limit can't be applied
+try:
+    import resource
+except ImportError:
+    resource = None
 
 # set logging config when module loads
 logging.basicConfig(
@@ -20,7 +28,16 @@ _DEFAULT_CONFIG = {
 
 
 class StockfishProcess():
-    """wrapper for a process running the Stockfish chess engine"""
+    """
+    wrapper for a process running the Stockfish chess engine
+
+    besides 'depth' and 'difficulty' the config can have (see placement.plan_engines()):
+        'threads' (int): UCI Threads option, defaults to the number of cpus or 1
+        'hash' (int): UCI Hash option in MB
+        'cpus' (list): cpus the engine may run on
+        'nice' (int): niceness of the engine
+        'memory_limit' (int): bytes of address space the engine may use
+    """
 
     def __init__(self, stockfish_path, config=None):
         path = pathlib.Path(stockfish_path)
@@ -33,13 +50,23 @@ class StockfishProcess():
                 str(stockfish_path)
             )
 
-        if not config:
-            config = _DEFAULT_CONFIG.copy()  # use copy to prevent changing state of shared object
-
+        # merge into a new dict to prevent changing state of shared object, missing keys fall back to the defaults
         self._config = {
-            **config
+            **_DEFAULT_CONFIG,
+            **(config or {})
         }
 
+        # the option values the engine currently has, so setoption is only sent when a value actually changes
+        self._options = {}
+
+        # True when commands have been sent that the engine may still be busy with (setoption, ucinewgame)
+        self._unsynced = False
+
+        # stop() can be called from another thread, the lock makes sure it's only sent to the engine during a search
+        self._stop_lock = threading.Lock()
+        self._searching = False
+        self._stop_requested = False
+
         try:
             self._process = subprocess.Popen(
                 [str(path)],
@@ -50,16 +77,25 @@ class StockfishProcess():
         except:
             raise RuntimeError(f'Failed to create process\npath: {str(path)}')
 
-        # TextIOWrappers around process's stdin and stdout to avoid need to constantly encode and decode bytes objects
+        # before the engine allocates its hash table and starts its search threads. a limit the os refuses (e.g. a
+        # cpu outside this process's affinity) would otherwise leave the engine running without anything to stop it
+        try:
+            self._apply_limits()
+        except:
+            self._process.stdin.close()
+            self._process.stdout.close()
+            self._process.terminate()
+            self._process.wait()
+            raise
+
+        # TextIOWrapper around process's stdin to avoid need to constantly encode str commands
         self._proc_in = io.TextIOWrapper(
             self._process.stdin,
             encoding='utf-8'
         )
 
-        self._proc_out = io.TextIOWrapper(
-            self._process.stdout,
-            encoding='utf-8'
-        )
+        # stdout is read in bulk and split into bytes lines, only the lines the app needs get decoded
+        self._proc_out = UCIReader(self._process.stdout)
 
         # get initial line from stockfish out of the way
         self._proc_out.readline()
@@ -68,14 +104,25 @@ class StockfishProcess():
         if self._isready() != 'readyok\n':
             raise RuntimeError('\'isready\' check failed')
 
+        # Threads is always sent, even at its default, because stockfish recreates its search threads when it's set
+        # and only threads created after _apply_limits() are guaranteed to inherit the cpus and niceness
+        self._set_option(Threads=self._config.get('threads', len(self._config.get('cpus') or []) or 1))
+        if 'hash' in self._config:
+            self._set_option(Hash=self._config['hash'])
+
         self.set_difficulty(self._config['difficulty'])
         self._ucinewgame()
+        self._sync()
 
         logging.info(f'INITIALIZED NEW STOCKFISH PROCESS {self._process.pid}')
 
     # TODO: learn the methods and objects used in this method better
     def __del__(self):
         """closes input and output pipes and terminates the process"""
+        # __init__ failed before the pipes were set up, and already terminated the process if it was started
+        if not hasattr(self, '_proc_out'):
+            return
+
         pid = self._process.pid
         self._proc_in.close()  # .close() flushes the stream before closing it, so .flush() is not required
         self._proc_out.close()
@@ -87,6 +134,29 @@ class StockfishProcess():
     def __str__(self):
         return f'Stockfish process {self._process.pid}'
 
+    def _apply_limits(self):
+        """applies the 'cpus', 'nice' and 'memory_limit' config values to the process, returns None"""
+        pid = self._process.pid
+
+        if self._config.get('cpus'):
+            if hasattr(os, 'sched_setaffinity'):
+                os.sched_setaffinity(pid, self._config['cpus'])
+            else:
+                warnings.warn('cpus not set: this platform doesn\'t support os.sched_setaffinity()')
+
+        if self._config.get('nice') is not None:
+            if hasattr(os, 'setpriority'):
+                os.setpriority(os.PRIO_PROCESS, pid, self._config['nice'])
+            else:
+                warnings.warn('nice not set: this platform doesn\'t support os.setpriority()')
+
+        if self._config.get('memory_limit'):
+            if resource is not None and hasattr(resource, 'prlimit'):
+                limit = self._config['memory_limit']
+                resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+            else:
+                warnings.warn('memory_limit not set: this platform doesn\'t support resource.prlimit()')
+
     def _write_to_proc(self, arg):
         assert arg[-1] == '\n'  # commands won't run unless they end with a newline
 
@@ -98,12 +168,12 @@ class StockfishProcess():
         self._write_to_proc('d\n')
 
         board = []
-        while (line := self._proc_out.readline())[0:3] != 'Fen':
-            board.append(line)
+        while not (line := self._proc_out.readline()).startswith(b'Fen'):
+            board.append(line.decode())
 
-        fen = line[5:]
-        key = self._proc_out.readline()[5:]
-        self._proc_out.readline()  # gets 'checkers: ' output out of pipe
+        fen = line[5:].decode()
+        key = self._proc_out.read_until(b'Key')[5:].decode()
+        self._proc_out.read_until(b'Checkers')  # gets 'checkers: ' output out of pipe
 
         return {
             'board': board,
@@ -116,40 +186,66 @@ class StockfishProcess():
         self._write_to_proc('uci\n')
 
         # skip over all outputs until 'uciok'
-        while self._proc_out.readline() != 'uciok\n':
-            pass
+        self._proc_out.read_until(b'uciok')
 
     def _isready(self):
         """runs 'isready' command, returns 'readyok'"""
         self._write_to_proc('isready\n')
-        return self._proc_out.readline()
+        return self._proc_out.read_until(b'readyok').decode() + '\n'
 
     def _ucinewgame(self):
         """runs 'ucinewgame' stockfish command, returns None"""
         self._write_to_proc('ucinewgame\n')
+        self._unsynced = True
 
-    def _go(self, depth=None):
-        """runs the 'go' stockfish command, returns a dict with 'bestmove' and 'ponder'"""
+    def _sync(self):
+        """
+        runs a single 'isready' barrier if any setoption/ucinewgame commands were sent since the last one, returns None
+
+        batching the barrier means a new game plus any number of option changes cost one round trip
+        """
+        if not self._unsynced:
+            return
+
+        if self._isready() != 'readyok\n':
+            raise RuntimeError('\'isready\' check failed')
+
+        self._unsynced = False
+
+    def _go(self, depth=None, info=False):
+        """
+        runs the 'go' stockfish command, returns a dict with 'bestmove' and 'ponder'
+
+        if info is True the dict also has an 'info' key with the last 'info ... pv ...' line of the search parsed
+        into an uciprotocol.Info (or None if the engine didn't output one)
+        """
         if depth is None:
             depth = self._config['depth']
 
-        self._write_to_proc(f'go depth {depth}\n')
+        with self._stop_lock:
+            self._write_to_proc(f'go depth {depth}\n')
+            self._searching = True
 
-        # skip over all the 'info depth...' lines in the output, stops when gets to 'best move ... ponder ...' line
-        while (line := self._proc_out.readline())[0:4] != 'best':
-            pass
+            # stop() was called before the search started, end it straight away
+            if self._stop_requested:
+                self._write_to_proc('stop\n')
 
         try:
-            ponder_index = line.index('ponder')  # index() instead of find() because index() raises error if the arg is not found
-            output = {
-                'bestmove': line[9 : (ponder_index - 1)],
-                'ponder': line[ponder_index+7 : -1]
-            }
-        except:
-            output = {
-                'bestmove': line[9:13],
-                'ponder': ''
-            }
+            if not info:
+                # skip over all the 'info depth...' lines in the output without looking at them
+                return parse_bestmove(self._proc_out.read_until(b'bestmove'))._asdict()
+
+            # only the last line with a pv is parsed, the others are just remembered as raw bytes
+            last_info = None
+            for line in self._proc_out.lines_until(b'bestmove'):
+                if line.startswith(b'info') and b' pv ' in line:
+                    last_info = line
+        finally:
+            with self._stop_lock:
+                self._searching = False
+
+        output = parse_bestmove(line)._asdict()
+        output['info'] = parse_info(last_info) if last_info else None
 
         return output
 
@@ -157,24 +253,78 @@ class StockfishProcess():
         """inputs the 'position' command to stockfish with an input string, returns None"""
         self._write_to_proc(f'position {arg}\n')
 
-    def get_next_move(self, pos):
+    def get_next_move(self, pos, depth=None):
         """runs the position command, returns the 'bestmove' output
 
         Parameters:
             pos (gamestate.Position): represents the game state
+            depth (int): search depth, defaults to the 'depth' config value
         Returns:
             (str): the 'bestmove' output of stockfish. e.g. 'e2e4'
         """
+        self._sync()
         self._position(str(pos))
-        next_move = self._go()['bestmove']
+        next_move = self._go(depth)['bestmove']
 
         return next_move
 
+    def analyse(self, pos, depth=None):
+        """
+        runs the position command and a search, returns the _go() dict with 'bestmove', 'ponder' and 'info'
+
+        Parameters:
+            pos (gamestate.Position): represents the game state
+            depth (int): search depth, defaults to the 'depth' config value
+        """
+        self._sync()
+        self._position(str(pos))
+
+        return self._go(depth, info=True)
+
+    def _perft(self, depth):
+        """runs 'go perft' on the current position, returns a dict mapping each legal move to its leaf node count"""
+        self._write_to_proc(f'go perft {depth}\n')
+
+        counts = {}
+        for line in self._proc_out.lines_until(b'Nodes searched'):
+            move, sep, count = line.partition(b': ')
+            if sep and not line.startswith(b'Nodes searched'):
+                counts[move.decode()] = int(count)
+
+        return counts
+
+    def perft(self, pos, depth):
+        """
+        runs 'go perft' on a position, returns dict mapping each legal move to its leaf node count at depth - 1
+
+        Parameters:
+            pos (gamestate.Position): represents the game state
+            depth (int): perft depth
+        """
+        self._sync()
+        self._position(str(pos))
+
+        return self._perft(depth)
+
+    def legal_moves(self, pos):
+        """
+        returns list of the legal moves in a position, without doing a search
+
+        Parameters:
+            pos (gamestate.Position): represents the game state
+        """
+        return list(self.perft(pos, 1))
+
     def _set_option(self, **options):
-        """runs 'setoption' command, returns None"""
+        """runs 'setoption' command for every option whose value differs from the engine's current one, returns None"""
         for key, val in options.items():
             key = key.replace('_', ' ')
+            if self._options.get(key) == str(val):
+                continue
+
             self._write_to_proc(f'setoption name {key} value {val}\n')
+            self._options[key] = str(val)
+            self._unsynced = True
 
     def set_difficulty(self, lvl):
         """
@@ -188,12 +338,39 @@ class StockfishProcess():
             return
 
         skill_level = (int(lvl) * 5) - 5  # maps lvl to 0, 5, 10, 15, 20
-        self._config['difficulty'] = skill_level
+        self._config['difficulty'] = int(lvl)
+
+        self._set_option(Skill_Level=skill_level)
 
-        self._set_option(Skill_Level=self._config['difficulty'])
+    @property
+    def difficulty(self):
+        """the difficulty (1 to 5) the engine is currently configured for"""
+        return self._config['difficulty']
 
     def new_game(self):
+        """
+        runs 'ucinewgame', returns None
+
+        the 'isready' barrier is deferred to the next get_next_move() so it also covers any option changes made
+        in between. also clears a stop() left over from the previous game
+        """
+        with self._stop_lock:
+            self._stop_requested = False
+
         self._ucinewgame()
 
+    def stop(self):
+        """
+        runs 'stop' to end the current search early, or the next one as soon as it starts, returns None
+
+        can be called from another thread while a search is running. the engine still outputs a bestmove for the
+        stopped search, so whoever is waiting on it gets a (weaker) move back as normal. stays in effect until
+        new_game()
+        """
+        with self._stop_lock:
+            self._stop_requested = True
+            if self._searching:
+                self._write_to_proc('stop\n')
+
 # for debugging purposes
 # print(StockfishProcess(r'..\..\..\Stockfish\Windows\stockfish_20011801_x64.exe').set_difficulty(0))
\ No newline at end of file
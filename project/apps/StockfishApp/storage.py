@@ -0,0 +1,63 @@
+import gzip
+from django.core.files.base import ContentFile
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from .assets import build_assets
+
+# brotli is optional, without it only .gz copies are written
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# file types worth compressing, images other than svg are already compressed
+_COMPRESSED_EXTENSIONS = ('.mjs', '.js', '.css', '.svg', '.html', '.json')
+
+
+class BundledManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    static files storage used by collectstatic
+
+    before the usual manifest processing it writes the js bundle and piece sprite (see assets.py) so they get hashed
+    filenames too, afterwards it writes a .gz and .br copy of every text file next to it so the web server can send
+    them precompressed (e.g. nginx gzip_static / brotli_static)
+    """
+
+    def _write(self, name, content):
+        # replace rather than let the storage pick a new name for an existing file
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
+
+    def _compress(self, name):
+        with self.open(name) as f:
+            content = f.read()
+
+        self._write(name + '.gz', gzip.compress(content, 9, mtime=0))  # mtime=0 keeps the output reproducible
+        if brotli is not None:
+            self._write(name + '.br', brotli.compress(content))
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+
+        def read(path):
+            storage, source_path = paths[path]
+            with storage.open(source_path) as f:
+                return f.read().decode()
+
+        for name, content in build_assets(read).items():
+            self._write(name, content)
+            paths[name] = (self, name)
+
+        processed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            yield name, hashed_name, processed
+
+            if hashed_name and not isinstance(processed, Exception):
+                processed_names.update((name, hashed_name))
+
+        # files can be yielded once per pass, so compress after the last one
+        for name in sorted(processed_names):
+            if name.endswith(_COMPRESSED_EXTENSIONS):
+                self._compress(name)
@@ -0,0 +1,29 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from ..assets import BUNDLE_PATH, SPRITE_PATH, JS_MODULES
+
+register = template.Library()
+
+
+def _use_built_assets():
+    # the bundle and sprite only exist after collectstatic, see storage.py
+    return getattr(settings, 'USE_BUILT_ASSETS', not settings.DEBUG)
+
+
+@register.simple_tag
+def app_scripts():
+    """returns list of urls of the scripts the page loads, the bundle or every module separately"""
+    if _use_built_assets():
+        return [static(BUNDLE_PATH)]
+
+    return [static(f'StockfishApp/js/{filename}') for filename in JS_MODULES]
+
+
+@register.simple_tag
+def piece_src(color, piece):
+    """returns url of the image for a piece, e.g. {% piece_src 'white' 'king' %}"""
+    if _use_built_assets():
+        return f'{static(SPRITE_PATH)}#{color}-{piece}'
+
+    return static(f'StockfishApp/assets/pieces/{color}/{piece}.svg')
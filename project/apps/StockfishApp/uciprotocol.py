@@ -0,0 +1,153 @@
+import os
+from collections import namedtuple
+
+# how many bytes to pull out of the pipe per os.read() call
+_READ_SIZE = 64 * 1024
+
+# typed versions of the engine output lines that the app cares about
+BestMove = namedtuple('BestMove', ['bestmove', 'ponder'])
+Info = namedtuple('Info', ['depth', 'seldepth', 'multipv', 'score', 'mate', 'nodes', 'nps', 'time', 'pv'])
+
+# info tokens that are followed by a single int value
+_INFO_INT_FIELDS = {
+    b'depth': 'depth',
+    b'seldepth': 'seldepth',
+    b'multipv': 'multipv',
+    b'nodes': 'nodes',
+    b'nps': 'nps',
+    b'time': 'time',
+}
+
+
+def parse_bestmove(line):
+    """parses a 'bestmove <move> [ponder <move>]' line (bytes), returns BestMove"""
+    tokens = line.split()
+    if not tokens or tokens[0] != b'bestmove' or len(tokens) < 2:
+        raise ValueError(f'not a bestmove line: {line!r}')
+
+    ponder = ''
+    if len(tokens) >= 4 and tokens[2] == b'ponder':
+        ponder = tokens[3].decode()
+
+    return BestMove(tokens[1].decode(), ponder)
+
+
+def parse_info(line):
+    """parses an 'info ...' line (bytes), returns Info with None for any field the line doesn't contain"""
+    tokens = line.split()
+    if not tokens or tokens[0] != b'info':
+        raise ValueError(f'not an info line: {line!r}')
+
+    fields = dict.fromkeys(Info._fields)
+    ind = 1
+    while ind < len(tokens):
+        token = tokens[ind]
+
+        if token in _INFO_INT_FIELDS and ind + 1 < len(tokens):
+            fields[_INFO_INT_FIELDS[token]] = int(tokens[ind + 1])
+            ind += 2
+        elif token == b'score' and ind + 2 < len(tokens):
+            # 'score cp <x>' or 'score mate <y>', optionally followed by 'lowerbound'/'upperbound'
+            kind, val = tokens[ind + 1], int(tokens[ind + 2])
+            fields['score' if kind == b'cp' else 'mate'] = val
+            ind += 3
+        elif token == b'pv':
+            # pv is always the last field on the line
+            fields['pv'] = tuple(move.decode() for move in tokens[ind + 1:])
+            break
+        elif token == b'string':
+            # 'info string ...' is free text, nothing after it can be parsed
+            break
+        else:
+            ind += 1
+
+    return Info(**fields)
+
+
+class UCIReader():
+    """
+    buffered reader for the stdout pipe of a UCI engine
+
+    reads the pipe in big chunks with os.read() and splits lines out of a bytearray, so lines are never decoded
+    unless the caller needs them. read_until() skips whole blocks of 'info' lines with a single find() instead of
+    looking at every line
+    """
+
+    def __init__(self, file):
+        self._file = file
+        self._fd = file.fileno()
+        self._buf = bytearray()
+        self._pos = 0  # start of the unread part of _buf
+
+    def close(self):
+        """closes the underlying pipe, returns None"""
+        self._file.close()
+
+    def _fill(self):
+        """drops the consumed part of the buffer and reads the next chunk from the pipe, returns None"""
+        if self._pos:
+            del self._buf[:self._pos]
+            self._pos = 0
+
+        chunk = os.read(self._fd, _READ_SIZE)
+        if not chunk:
+            raise EOFError('engine closed its output pipe')
+
+        self._buf += chunk
+
+    def _take_line(self, start):
+        """
+        returns the complete line starting at index start of the buffer (without line ending) and marks it as
+        consumed, or returns None if the line hasn't been fully read yet
+        """
+        end = self._buf.find(b'\n', start)
+        if end == -1:
+            return None
+
+        line = bytes(self._buf[start:end])
+        self._pos = end + 1
+
+        return line.rstrip(b'\r')
+
+    def readline(self):
+        """returns the next line from the engine as bytes without the line ending"""
+        while (line := self._take_line(self._pos)) is None:
+            self._fill()
+
+        return line
+
+    def read_until(self, prefix):
+        """skips over all lines until one starts with prefix, returns that line as bytes without the line ending"""
+        if isinstance(prefix, str):
+            prefix = prefix.encode()
+
+        needle = b'\n' + prefix
+        while True:
+            if self._buf.startswith(prefix, self._pos):
+                start = self._pos
+            else:
+                # the newline before the line is part of the needle, so search from the last consumed newline
+                start = self._buf.find(needle, max(self._pos - 1, 0))
+                if start != -1:
+                    start += 1
+
+            if start != -1 and (line := self._take_line(start)) is not None:
+                return line
+
+            if start == -1:
+                # nothing in the buffer matches, only the trailing partial line can still turn into a match
+                self._pos = max(self._buf.rfind(b'\n') + 1, self._pos)
+
+            self._fill()
+
+    def lines_until(self, prefix):
+        """yields every line (bytes) up to and including the first one that starts with prefix"""
+        if isinstance(prefix, str):
+            prefix = prefix.encode()
+
+        while True:
+            line = self.readline()
+            yield line
+
+            if line.startswith(prefix):
+                return
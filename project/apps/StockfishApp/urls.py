@@ -4,5 +4,9 @@ from project.apps.StockfishApp import views
 app_name = 'StockfishApp'
 urlpatterns = [
     path('', views.index, name='index'),
+    path('new_game/', views.new_game, name='new_game'),
     path('get_move/', views.stockfish_next_move, name='stockfish_next_move'),
+    path('cancel_move/', views.cancel_move, name='cancel_move'),
+    path('review/', views.review_game, name='review_game'),
+    path('metrics/', views.metrics, name='metrics'),
 ]
@@ -1,10 +1,15 @@
 from django.shortcuts import render
-from django.http import JsonResponse, HttpResponse
-from django.http import HttpResponseBadRequest
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.http import HttpResponseBadRequest, HttpResponseNotFound
 from . import stockfishdispatcher
 from .gamestate import Position
+from .gamestate import MOVE_REGEX
+from .sessions import SessionStore
+from .pgn import parse_pgn
+from . import gamereview
 import json
-from .exceptions import InvalidPositionException
+import uuid
+from .exceptions import InvalidPositionException, IllegalMoveException
 import logging, sys
 
 # set logging config when module loads
@@ -13,11 +18,44 @@ logging.basicConfig(
     level=logging.INFO
 )
 
+# move history of every game in progress, keyed by the game id handed out by new_game()
+_SESSIONS = SessionStore()
+
+# limits for review_game() so a single request can't tie up the engines for too long
+_REVIEW_MAX_PLIES = 600
+_REVIEW_MAX_DEPTH = 20
+
 
 # Create your views here.
 def index(request):
     return render(request, 'StockfishApp/chessboard.html')
 
+def new_game(request):
+    # input: {'difficulty': <1-5>}
+    #     or {'difficulty': <1-5>, 'fen': '<FENSTRING>'} for a game that doesn't start from the normal starting
+    #     position, e.g. the starting position with black to move when the player picked black
+    # output: {'game_id': '<GAME_ID>'}
+
+    if not request.is_ajax() or not request.method == 'POST':
+        return HttpResponseBadRequest('request must be an ajax HTTP POST request with json of the form "{"difficulty": <1-5>}"')
+
+    try:
+        data = json.loads(request.body.decode())
+        difficulty = int(data['difficulty'])
+        if not 1 <= difficulty <= 5:
+            return HttpResponseBadRequest('difficulty must be between 1 and 5')
+        fenstring = str(data.get('fen') or '')
+        Position(fenstring).board  # games can only start from positions the engine can play from
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return HttpResponseBadRequest('failed to deserialize json')
+    except InvalidPositionException:
+        return HttpResponseBadRequest('invalid fenstring')
+
+    session = _SESSIONS.create(difficulty, fenstring)
+    logging.info(f'started game {session.game_id}, {len(_SESSIONS)} games in progress')
+
+    return JsonResponse({'game_id': session.game_id})
+
 def stockfish_next_move(request):
     # make sure there is a JSON response for if the fen string failed to make a Position or if StockfishProcess failed to provide response
     # TODO: add tests for stockfishdispatcher
@@ -27,7 +65,14 @@ def stockfish_next_move(request):
     # package response into JsonResponse and return it to the client
 
     # input: {'difficulty': <1-5>, 'fen': '<FENSTRING>'}
+    #     or {'difficulty': <1-5>, 'fen': '<FENSTRING>', 'game_id': '<GAME_ID>', 'move': '<PLAYER_MOVE>'}
+    #     with a game_id the position is built from the game's move history instead of the fen,
+    #     'move' can be left out if stockfish makes the first move of the game
+    #     either form can have a 'request_id': '<REQUEST_ID>' for cancel_move() to refer to the request by,
+    #     and the game_id form a 'ply': <int> of moves played including 'move' so a retried request isn't added twice
     # output: {'nextmove': '<NEXT_MOVE>'}
+    #     or {'nextmove': null, 'gameover': 'checkmate' | 'stalemate'} if stockfish has no legal moves
+    #     or {'nextmove': null, 'cancelled': true} if the request was cancelled before stockfish answered
 
     # http status 408 = method timeout
     # http status 400 = bad request
@@ -40,14 +85,67 @@ def stockfish_next_move(request):
         # TODO: find out if necessary to sanitize JSON request
         data = json.loads(request.body.decode())
         difficulty = int(data['difficulty'])
-        pos = Position(data['fen'])
-        req = {'difficulty': difficulty, 'fen': pos}
+        if not 1 <= difficulty <= 5:
+            return HttpResponseBadRequest('difficulty must be between 1 and 5')
+        session = None
+
+        if 'game_id' in data:
+            session = _SESSIONS.get(data['game_id'])
+            if session is None:
+                return HttpResponseNotFound('unknown or expired game_id')
+
+            pos = session.position()
+            ply = int(data['ply']) if data.get('ply') is not None else None
+
+            # a retried request sends a move the session may already have, 'ply' says where the move belongs
+            if data.get('move') and ply is not None and ply <= len(session):
+                moves = session.moves
+                if ply < 1 or moves[ply - 1] != data['move']:
+                    return HttpResponseBadRequest('move doesn\'t match the game')
+
+                # the engine answered the move before the retry came in, send the same answer again
+                if ply < len(moves):
+                    return JsonResponse({'nextmove': moves[ply]})
+            elif data.get('move'):
+                # only store the move once it's known to be legal
+                pos.push(data['move'])
+                _SESSIONS.push_moves(session, data['move'])
+
+            game_length = len(session)
+        else:
+            pos = Position(data['fen'])
+            pos.board  # builds the board so positions the engine can't play from are rejected here
+
+        req = {'difficulty': difficulty, 'fen': pos, 'request_id': str(data.get('request_id') or uuid.uuid4().hex)}
     except json.JSONDecodeError:
         return HttpResponseBadRequest('failed to deserialize json')
+    except IllegalMoveException:
+        return HttpResponseBadRequest('illegal move')
     except InvalidPositionException:
         return HttpResponseBadRequest('invalid fenstring')
+    except (KeyError, TypeError, ValueError):
+        return HttpResponseBadRequest('failed to deserialize json')
+
+    # finished games are answered without an engine round trip
+    if not pos.legal_moves():
+        return JsonResponse(
+            {
+                'nextmove': None,
+                'gameover': 'checkmate' if pos.is_check() else 'stalemate',
+            }
+        )
+
+    try:
+        next_move = stockfishdispatcher.get_next_move(req)
+    except ValueError:
+        return HttpResponseBadRequest('request_id is already in use')
 
-    next_move = stockfishdispatcher.get_next_move(req)
+    if next_move is None:
+        return JsonResponse({'nextmove': None, 'cancelled': True})
+
+    # an earlier request for the same move may have stored its answer while this one was searching
+    if session is not None and MOVE_REGEX.fullmatch(next_move) and len(session) == game_length:
+        _SESSIONS.push_moves(session, next_move)
 
     res = JsonResponse(
         {
@@ -58,3 +156,65 @@ def stockfish_next_move(request):
     print(res.content)
 
     return res
+
+def cancel_move(request):
+    # input: {'request_id': '<REQUEST_ID>'} of a get_move request the client has given up on
+    # output: {'cancelled': true} or {'cancelled': false} if the request had already finished
+    # the engine searching for the request is stopped and goes back to the pool straight away
+
+    if not request.is_ajax() or not request.method == 'POST':
+        return HttpResponseBadRequest('request must be an ajax HTTP POST request with json of the form "{"request_id": "<REQUEST_ID>"}"')
+
+    try:
+        request_id = str(json.loads(request.body.decode())['request_id'])
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return HttpResponseBadRequest('failed to deserialize json')
+
+    return JsonResponse({'cancelled': stockfishdispatcher.cancel(request_id)})
+
+def metrics(request):
+    # output: {'queued_requests': <int>, 'idle_processes': <int>, 'depth_by_difficulty': {...}, ...}
+    return JsonResponse(stockfishdispatcher.get_metrics())
+
+def review_game(request):
+    # input: {'pgn': '<PGN>'}
+    #     or {'fen': '<FENSTRING>', 'moves': ['<UCI_MOVE>', ...]} where 'fen' can be left out for the starting position
+    #     both can have 'depth': <int>
+    # output: newline delimited json, one line per move in the order the analysis finishes:
+    #     {'ply': <int>, 'move': '<MOVE>', 'eval': <cp>, 'best_move': '<MOVE>', 'best_eval': <cp>, 'loss': <cp>,
+    #      'flag': null | 'inaccuracy' | 'mistake' | 'blunder'}
+
+    if not request.is_ajax() or not request.method == 'POST':
+        return HttpResponseBadRequest('request must be an ajax HTTP POST request with json of the form "{"pgn": "<PGN>"}"')
+
+    try:
+        data = json.loads(request.body.decode())
+
+        if 'pgn' in data:
+            fenstring, moves = parse_pgn(data['pgn'])
+        else:
+            fenstring, moves = data.get('fen', ''), list(data['moves'])
+
+        if len(moves) > _REVIEW_MAX_PLIES:
+            return HttpResponseBadRequest(f'games longer than {_REVIEW_MAX_PLIES} plies can\'t be reviewed')
+
+        # checks that the game is playable before any engine time is spent on it
+        Position(fenstring, moves).board
+
+        depth = None
+        if 'depth' in data:
+            # 'go depth 0' is an unlimited search to stockfish, it would hold the review's engines indefinitely
+            if int(data['depth']) < 1:
+                return HttpResponseBadRequest('depth must be at least 1')
+            depth = max(1, min(int(data['depth']), _REVIEW_MAX_DEPTH))
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return HttpResponseBadRequest('failed to deserialize json')
+    except IllegalMoveException:
+        return HttpResponseBadRequest('illegal move')
+    except InvalidPositionException:
+        return HttpResponseBadRequest('invalid fenstring')
+
+    return StreamingHttpResponse(
+        (json.dumps(result) + '\n' for result in gamereview.review_game(fenstring, moves, depth)),
+        content_type='application/x-ndjson'
+    )
@@ -55,7 +55,7 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [
-            '../BrowserChessVsStockfish/project/apps/StockfishApp/templates/'
+            os.path.join(BASE_DIR, 'project/apps/StockfishApp/templates/')
         ],
         'APP_DIRS': False,
         'OPTIONS': {
@@ -63,6 +63,12 @@ TEMPLATES = [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
             ],
+            # templates are compiled once per process instead of on every request
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -100,6 +106,13 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/3.0/howto/static-files/
 
-STATIC_ROOT = '../BrowserChessVsStockfish/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'static/')
 
 STATIC_URL = '/static/'
+
+# collectstatic bundles the js modules, builds the piece sprite, adds content hashes to filenames and writes gzip
+# (and brotli, if installed) copies of each file, see project/apps/StockfishApp/storage.py
+STATICFILES_STORAGE = 'project.apps.StockfishApp.storage.BundledManifestStaticFilesStorage'
+
+# serve the bundle and sprite made by collectstatic instead of the source files, they don't exist until it has run
+USE_BUILT_ASSETS = not DEBUG
@@ -0,0 +1,93 @@
+import unittest
+from project.apps.StockfishApp.assets import bundle_modules, minify_js, build_sprite
+
+PIECE_SVG = '''<?xml version="1.0"?>
+<!-- a comment -->
+<svg xmlns="http://www.w3.org/2000/svg" width="45" height="45">
+    <g style="fill:none">
+        <path d="M 22,10 L 23,11"/>
+    </g>
+</svg>
+'''
+
+
+class BundleModulesTestCase(unittest.TestCase):
+    def test_imports_and_exports_removed(self):
+        bundle = bundle_modules([
+            ('a.mjs', "const X = 1;\nfunction f(){ return X; }\nexport { f };\n"),
+            ('b.mjs', "import { f } from './a.mjs';\nconst X = 2;\nf();\n"),
+        ])
+
+        self.assertNotIn('import', bundle)
+        self.assertNotIn('export {', bundle)
+        self.assertTrue(bundle.startswith('let f;\n'))
+
+    def test_modules_in_own_blocks(self):
+        # both modules declare X, they must not end up in the same scope
+        bundle = bundle_modules([('a.mjs', 'const X = 1;\n'), ('b.mjs', 'const X = 2;\n')])
+
+        self.assertEqual(bundle, '// a.mjs\n{\nconst X = 1;\n\n}\n// b.mjs\n{\nconst X = 2;\n\n}\n')
+
+    def test_exports_assigned_at_end_of_block(self):
+        bundle = bundle_modules([('a.mjs', 'class A{}\nfunction g(){}\nexport { A, g };\n')])
+
+        self.assertIn('function __export_a_mjs(m){ A = m.A; g = m.g; }', bundle)
+        self.assertIn('__export_a_mjs({ A, g });\n\n}', bundle)
+
+    def test_unsupported_syntax(self):
+        with self.assertRaises(ValueError):
+            bundle_modules([('a.mjs', 'export default 1;\n')])
+        with self.assertRaises(ValueError):
+            bundle_modules([('a.mjs', "import * as b from './b.mjs';\n")])
+
+
+class MinifyJsTestCase(unittest.TestCase):
+    def test_comments_and_whitespace(self):
+        source = (
+            '// line comment\n'
+            'function f(a, b){\n'
+            '    /* block\n'
+            '       comment */\n'
+            '\n'
+            '    return a  +  b;  // trailing\n'
+            '}\n'
+        )
+        self.assertEqual(minify_js(source), 'function f(a, b){\nreturn a + b;\n}\n')
+
+    def test_strings_unchanged(self):
+        source = "let a = '// not a comment';\nlet b = \"  /* nor this */  \";\nlet c = `${a}  //  ${b}`;\n"
+        self.assertEqual(minify_js(source), source)
+
+    def test_escaped_quotes(self):
+        source = "let a = 'it\\'s // here';\n"
+        self.assertEqual(minify_js(source), source)
+
+    def test_regex_and_division(self):
+        self.assertEqual(minify_js("let r = /[/]\\/ // x/g;\n"), "let r = /[/]\\/ // x/g;\n")
+        self.assertEqual(minify_js("let d = (a) / b; // half\n"), "let d = (a) / b;\n")
+
+    def test_unterminated(self):
+        with self.assertRaises(ValueError):
+            minify_js("let a = 'oops;\n")
+        with self.assertRaises(ValueError):
+            minify_js("/* oops\n")
+
+
+class BuildSpriteTestCase(unittest.TestCase):
+    def test_views_and_offsets(self):
+        sprite = build_sprite([('white-king', PIECE_SVG), ('black-king', PIECE_SVG)])
+
+        self.assertTrue(sprite.startswith('<svg xmlns="http://www.w3.org/2000/svg" version="1.1" width="90" height="45"'))
+        self.assertIn('<view id="white-king" viewBox="0 0 45 45"/>', sprite)
+        self.assertIn('<view id="black-king" viewBox="45 0 45 45"/>', sprite)
+        self.assertIn('<svg x="45" y="0" width="45" height="45"><g style="fill:none"><path d="M 22,10 L 23,11"/></g></svg>', sprite)
+        self.assertNotIn('comment', sprite)
+        self.assertNotIn('<?xml', sprite)
+
+    def test_no_svg(self):
+        with self.assertRaises(ValueError):
+            build_sprite([('white-king', '<p>not an svg</p>')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from project.apps.StockfishApp.depthcontroller import DepthController
+
+
+class DepthControllerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.controller = DepthController({1: (4, 10), 5: (9, 10)}, process_count=10, target_seconds=0.5)
+
+    def test_full_depth_without_load(self):
+        self.assertEqual(self.controller.depth_for(1, 0), 10)
+        self.assertEqual(self.controller.depth_for(5, 0), 10)
+
+    def test_backlog_lowers_depth(self):
+        self.assertEqual(self.controller.depth_for(1, 5), 7)
+        self.assertEqual(self.controller.depth_for(1, 10), 4)
+        self.assertEqual(self.controller.depth_for(1, 100), 4)  # never below min depth
+        self.assertEqual(self.controller.depth_for(5, 100), 9)
+
+    def test_unknown_difficulty(self):
+        # uses the closest difficulty's limits instead of raising
+        self.assertEqual(self.controller.depth_for(6, 100), 9)
+        self.assertEqual(self.controller.depth_for(0, 100), 4)
+        self.assertEqual(set(self.controller.metrics()['depth_by_difficulty']), {1, 5})
+
+    def test_slow_searches_lower_depth(self):
+        self.controller.record(1.0)  # twice the target
+        self.assertEqual(self.controller.depth_for(1, 0), 4)
+
+        self.controller.record(0.5)
+        self.assertLess(self.controller.depth_for(1, 0), 10)
+
+    def test_depth_recovers(self):
+        self.controller.record(1.0)
+        self.assertEqual(self.controller.depth_for(1, 20), 4)
+
+        for _ in range(50):
+            self.controller.record(0.1)
+        self.assertEqual(self.controller.depth_for(1, 0), 10)
+
+    def test_metrics(self):
+        self.controller.depth_for(1, 0)
+        self.controller.depth_for(1, 10)
+        self.controller.record(0.25)
+
+        metrics = self.controller.metrics()
+        self.assertEqual(metrics['searches'], 2)
+        self.assertEqual(metrics['reduced_depth_searches'], 1)
+        self.assertEqual(metrics['avg_search_seconds'], 0.25)
+        self.assertEqual(metrics['depth_by_difficulty'], {1: 4, 5: 10})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
-from project.apps.StockfishApp.gamestate import Position
-from project.apps.StockfishApp.exceptions import InvalidPositionException
+from project.apps.StockfishApp.gamestate import Position, Board, encode_move, decode_move, STARTING_FEN
+from project.apps.StockfishApp.exceptions import InvalidPositionException, IllegalMoveException
 
 
 class PositionClassTestCase(unittest.TestCase):
@@ -147,5 +147,125 @@ class PositionClassTestCase(unittest.TestCase):
         with self.assertRaises(InvalidPositionException):
             pos = Position('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 y')
 
+    def test_push(self):
+        pos = Position()
+        pos.push('e2e4')
+        pos.push('e7e5')
+
+        self.assertEqual(str(pos), 'startpos moves e2e4 e7e5')
+        self.assertEqual(pos.move_list, ['e2e4', 'e7e5'])
+        self.assertEqual(pos.fen(), 'rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2')
+
+    def test_push_illegal(self):
+        pos = Position()
+        for move in ['e2e5', 'e1e2', 'e7e5', 'a1a3', 'abc', 'e2e4q']:
+            with self.assertRaises(IllegalMoveException):
+                pos.push(move)
+
+        self.assertIsNone(pos.moves)
+
+    def test_illegal_moves_argument(self):
+        pos = Position(moves=['e2e4', 'e2e4'])
+        with self.assertRaises(IllegalMoveException):
+            pos.board
+
+    def test_legal_moves(self):
+        self.assertEqual(len(Position().legal_moves()), 20)
+        self.assertCountEqual(
+            Position('7k/P7/8/8/8/8/8/K7 w - - 0 1').legal_moves(),
+            ['a7a8q', 'a7a8r', 'a7a8b', 'a7a8n', 'a1a2', 'a1b1', 'a1b2']
+        )
+
+    def test_checkmate(self):
+        pos = Position(moves=['f2f3', 'e7e5', 'g2g4', 'd8h4'])
+        self.assertTrue(pos.is_check())
+        self.assertTrue(pos.is_checkmate())
+        self.assertFalse(pos.is_stalemate())
+        self.assertEqual(pos.legal_moves(), [])
+
+    def test_stalemate(self):
+        pos = Position('7k/5Q2/6K1/8/8/8/8/8 b - - 0 1')
+        self.assertFalse(pos.is_check())
+        self.assertTrue(pos.is_stalemate())
+        self.assertFalse(pos.is_checkmate())
+
+    def test_not_game_over(self):
+        pos = Position()
+        self.assertFalse(pos.is_check())
+        self.assertFalse(pos.is_checkmate())
+        self.assertFalse(pos.is_stalemate())
+
+    def test_unplayable_fen(self):
+        # these match the fen regex but aren't positions the engine can play from
+        for fen in [
+            'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQ1BNR w KQkq - 0 1',     # no white king
+            'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBKKBNR w KQkq - 0 1',     # two white kings
+            'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNRR w KQkq - 0 1',    # 9 squares on a rank
+            'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPP/RNBQKBNR w KQkq - 0 1',      # 7 squares on a rank
+            'Pnbqkbnr/pppppppp/8/8/8/8/1PPPPPPP/RNBQKBNR w KQkq - 0 1',     # pawn on the last rank
+            'rnb1kbnr/pppppppp/8/8/8/8/PPPPqPPP/RNBQKBNR b KQkq - 0 1',     # side not to move is in check
+            '4k3/8/8/3P4/8/8/8/4K3 w - e6 0 1',                             # no pawn behind the en passant square
+            '4k3/8/8/3P4/8/8/8/4K3 w - e4 0 1',                             # en passant square on the wrong rank
+            '4k3/8/8/3Pp3/8/8/8/4K3 w - e3e6 0 1',                          # more than one en passant square
+            '4k3/8/4p3/3Pp3/8/8/8/4K3 w - e6 0 1',                          # en passant square isn't empty
+            '4k3/8/8/8/3pP3/8/8/4K3 w - e3 0 1',                            # en passant square for the wrong side
+        ]:
+            with self.assertRaises(InvalidPositionException):
+                Position(fen).board
+
+
+class BoardClassTestCase(unittest.TestCase):
+    def test_fen_round_trip(self):
+        for fen in [
+            STARTING_FEN,
+            'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+            'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+            'rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3',
+        ]:
+            self.assertEqual(Board(fen).fen(), fen)
+
+    def test_en_passant_square_only_when_capturable(self):
+        self.assertEqual(
+            Position(moves=['e2e4']).fen(),
+            'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1'
+        )
+        self.assertEqual(
+            Position(moves=['e2e4', 'a7a6', 'e4e5', 'd7d5']).fen(),
+            'rnbqkbnr/1pp1pppp/p7/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq d6 0 3'
+        )
+
+    def test_en_passant_capture(self):
+        pos = Position(moves=['e2e4', 'a7a6', 'e4e5', 'd7d5', 'e5d6'])
+        self.assertEqual(pos.fen(), 'rnbqkbnr/1pp1pppp/p2P4/8/8/8/PPPP1PPP/RNBQKBNR b KQkq - 0 3')
+
+    def test_castling(self):
+        pos = Position('r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1', ['e1g1', 'e8c8'])
+        self.assertEqual(pos.fen(), '2kr3r/8/8/8/8/8/8/R4RK1 w - - 2 2')
+
+    def test_no_castling_through_check(self):
+        pos = Position('r3k2r/8/8/8/8/8/5r2/R3K2R w KQkq - 0 1')
+        self.assertNotIn('e1g1', pos.legal_moves())
+        self.assertIn('e1c1', pos.legal_moves())
+
+    def test_castling_rights_lost_when_rook_captured(self):
+        pos = Position('r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1', ['a1a8'])
+        self.assertEqual(pos.fen(), 'R3k2r/8/8/8/8/8/8/4K2R b Kk - 0 1')
+
+    def test_promotion(self):
+        pos = Position('7k/P7/8/8/8/8/8/K7 w - - 0 1', ['a7a8n'])
+        self.assertEqual(pos.fen(), 'N6k/8/8/8/8/8/8/K7 b - - 0 1')
+
+    def test_move_encoding(self):
+        for move in ['a1a2', 'e2e4', 'h8h1', 'g1f3', 'e7e8q', 'a2a1n', 'b7c8r', 'h2h1b']:
+            self.assertEqual(decode_move(encode_move(move)), move)
+
+        self.assertLess(encode_move('h7h8q'), 1 << 16)
+
+    def test_invalid_move_encoding(self):
+        for move in ['', 'e2', 'e2e9', 'i2i4', 'e7e8k', 'e2e4 ']:
+            with self.assertRaises(ValueError):
+                encode_move(move)
+
+
 if __name__ == '__main__':
     unittest.main()
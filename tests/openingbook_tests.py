@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from project.apps.StockfishApp.openingbook import OpeningBook, book_key, write_book
+
+
+class OpeningBookTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'book.bin')
+
+        self.entries = {
+            book_key(1, []): [('e2e4', 3), ('a2a3', 5)],
+            book_key(5, []): [('e2e4', 8)],
+            book_key(5, ['e2e4', 'e7e5']): [('g1f3', 6), ('b1c3', 2)],
+            book_key(3, ['a2a4', 'h7h5']): [('a4a5', 1), ('a1a3', 1)],
+        }
+        write_book(self.path, self.entries)
+        self.book = OpeningBook(self.path)
+
+    def tearDown(self):
+        self.book.close()
+        self.dir.cleanup()
+
+    def test_len(self):
+        self.assertEqual(len(self.book), 4)
+
+    def test_lookup(self):
+        # moves are stored most played first
+        self.assertEqual(self.book.lookup(1, []), [('a2a3', 5), ('e2e4', 3)])
+        self.assertEqual(self.book.lookup(5, []), [('e2e4', 8)])
+        self.assertEqual(self.book.lookup(5, ['e2e4', 'e7e5']), [('g1f3', 6), ('b1c3', 2)])
+        self.assertEqual(self.book.lookup(3, ['a2a4', 'h7h5']), [('a4a5', 1), ('a1a3', 1)])
+
+    def test_lookup_missing(self):
+        self.assertIsNone(self.book.lookup(2, []))
+        self.assertIsNone(self.book.lookup(5, ['e2e4']))
+        self.assertIsNone(self.book.lookup(5, ['e7e5', 'e2e4']))
+
+    def test_choose(self):
+        self.assertEqual(self.book.choose(5, []), 'e2e4')
+        self.assertIn(self.book.choose(1, []), ['e2e4', 'a2a3'])
+        self.assertIsNone(self.book.choose(2, []))
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'not a book file')
+
+        with self.assertRaises(ValueError):
+            OpeningBook(self.path)
+
+    def test_truncated_file(self):
+        with open(self.path, 'rb') as file:
+            data = file.read()
+
+        # empty, shorter than the header, cut off inside the index, and cut off inside the last entry's moves
+        for length in (0, 5, 20, len(data) - 3):
+            with self.subTest(length=length):
+                with open(self.path, 'wb') as file:
+                    file.write(data[:length])
+
+                with self.assertRaises(ValueError):
+                    OpeningBook(self.path)
+
+    def test_many_entries(self):
+        moves = ['a2a3', 'b2b3', 'c2c3', 'd2d3', 'e2e3', 'f2f3', 'g2g3', 'h2h3']
+        entries = {book_key(difficulty, [move]): [(move, difficulty)] for difficulty in range(1, 6) for move in moves}
+
+        path = os.path.join(self.dir.name, 'many.bin')
+        write_book(path, entries)
+        book = OpeningBook(path)
+
+        for difficulty in range(1, 6):
+            for move in moves:
+                self.assertEqual(book.lookup(difficulty, [move]), [(move, difficulty)])
+
+        book.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+from project.apps.StockfishApp.perft import PERFT_POSITIONS, perft, divide, timed_perft
+from project.apps.StockfishApp.gamestate import Board, STARTING_FEN
+
+# deeper counts take too long for the test suite, use 'python manage.py perft --depth <n>' for those
+_MAX_TEST_NODES = 100000
+
+
+class PerftTestCase(unittest.TestCase):
+    def test_standard_positions(self):
+        for name, fen, expected_counts in PERFT_POSITIONS:
+            board = Board(fen)
+            for depth, expected in enumerate(expected_counts, start=1):
+                if expected > _MAX_TEST_NODES:
+                    break
+
+                with self.subTest(position=name, depth=depth):
+                    self.assertEqual(perft(board, depth), expected)
+
+    def test_depth_zero(self):
+        self.assertEqual(perft(Board(), 0), 1)
+
+    def test_divide(self):
+        counts = divide(Board(), 2)
+        self.assertEqual(len(counts), 20)
+        self.assertEqual(counts['e2e4'], 20)
+        self.assertEqual(sum(counts.values()), 400)
+
+    def test_timed_perft(self):
+        nodes, seconds = timed_perft(STARTING_FEN, 2)
+        self.assertEqual(nodes, 400)
+        self.assertGreaterEqual(seconds, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
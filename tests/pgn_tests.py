@@ -0,0 +1,82 @@
+import unittest
+from project.apps.StockfishApp.pgn import parse_pgn, san_to_move
+from project.apps.StockfishApp.gamestate import Board, decode_move
+from project.apps.StockfishApp.exceptions import IllegalMoveException
+
+_OPERA_GAME = '''[Event "A Night at the Opera"]
+[Site "Paris FRA"]
+[Date "1858.??.??"]
+[White "Paul Morphy"]
+[Black "Duke Karl / Count Isouard"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 d6 3. d4 Bg4 {This is a weak move already.} 4. dxe5 Bxf3 5. Qxf3 dxe5
+6. Bc4 Nf6 7. Qb3 Qe7 8. Nc3 c6 9. Bg5 {Black is in what's like a zugzwang position here.} b5?!
+10. Nxb5! cxb5 11. Bxb5+ Nbd7 12. O-O-O Rd8 13. Rxd7 Rxd7 (13... Nxd7 14. Qb8+ (14. Bxd7+) Nxb8) 14. Rd1 Qe6
+15. Bxd7+ Nxd7 16. Qb8+ $1 Nxb8 17. Rd8# 1-0
+'''
+
+
+class SanToMoveTestCase(unittest.TestCase):
+    def test_pawn_and_piece_moves(self):
+        board = Board()
+        self.assertEqual(decode_move(san_to_move(board, 'e4')), 'e2e4')
+        self.assertEqual(decode_move(san_to_move(board, 'Nf3')), 'g1f3')
+        self.assertEqual(decode_move(san_to_move(board, 'Nc3')), 'b1c3')
+
+    def test_disambiguation(self):
+        board = Board('4k3/8/8/8/8/8/4K3/R6R w - - 0 1')
+        with self.assertRaises(IllegalMoveException):
+            san_to_move(board, 'Rd1')  # ambiguous
+        self.assertEqual(decode_move(san_to_move(board, 'Rad1')), 'a1d1')
+        self.assertEqual(decode_move(san_to_move(board, 'Rhf1')), 'h1f1')
+
+        board = Board('4k3/8/8/8/R7/8/8/R3K3 w - - 0 1')
+        self.assertEqual(decode_move(san_to_move(board, 'R4a2')), 'a4a2')
+
+    def test_castling(self):
+        board = Board('r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1')
+        self.assertEqual(decode_move(san_to_move(board, 'O-O')), 'e1g1')
+        self.assertEqual(decode_move(san_to_move(board, 'O-O-O+')), 'e1c1')
+        self.assertEqual(decode_move(san_to_move(board, '0-0')), 'e1g1')
+
+    def test_promotion(self):
+        board = Board('7k/P7/8/8/8/8/8/K7 w - - 0 1')
+        self.assertEqual(decode_move(san_to_move(board, 'a8=Q+')), 'a7a8q')
+        self.assertEqual(decode_move(san_to_move(board, 'a8N')), 'a7a8n')
+
+        with self.assertRaises(IllegalMoveException):
+            san_to_move(board, 'a8')
+
+    def test_illegal(self):
+        for san in ['e5', 'Ke2', 'Nf4', 'xyz', '']:
+            with self.assertRaises(IllegalMoveException):
+                san_to_move(Board(), san)
+
+
+class ParsePgnTestCase(unittest.TestCase):
+    def test_opera_game(self):
+        fenstring, moves = parse_pgn(_OPERA_GAME)
+
+        self.assertEqual(fenstring, '')
+        self.assertEqual(len(moves), 33)
+        self.assertEqual(moves[:4], ['e2e4', 'e7e5', 'g1f3', 'd7d6'])
+        self.assertEqual(moves[22], 'e1c1')  # 12. O-O-O
+        self.assertEqual(moves[-1], 'd1d8')
+
+    def test_fen_tag(self):
+        fenstring, moves = parse_pgn('[SetUp "1"]\n[FEN "7k/P7/8/8/8/8/8/K7 w - - 0 1"]\n\n1. a8=Q# 1-0')
+        self.assertEqual(fenstring, '7k/P7/8/8/8/8/8/K7 w - - 0 1')
+        self.assertEqual(moves, ['a7a8q'])
+
+    def test_black_to_move_numbering(self):
+        fenstring, moves = parse_pgn('[FEN "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"]\n\n1... e5 2.Nf3 *')
+        self.assertEqual(moves, ['e7e5', 'g1f3'])
+
+    def test_illegal_move(self):
+        with self.assertRaises(IllegalMoveException):
+            parse_pgn('1. e4 e5 2. Ke3')
+
+
+if __name__ == '__main__':
+    unittest.main()
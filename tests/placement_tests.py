@@ -0,0 +1,74 @@
+import unittest
+from project.apps.StockfishApp.placement import plan_engines, memory_limit, _parse_cpulist
+
+
+class ParseCpulistTestCase(unittest.TestCase):
+    def test_ranges(self):
+        self.assertEqual(_parse_cpulist('0-3,8,10-11\n'), [0, 1, 2, 3, 8, 10, 11])
+        self.assertEqual(_parse_cpulist('5'), [5])
+        self.assertEqual(_parse_cpulist('\n'), [])
+
+
+class PlanEnginesTestCase(unittest.TestCase):
+    def test_one_cpu_per_engine(self):
+        configs = plan_engines(10, cpus=list(range(8)), nodes=[list(range(8))])
+
+        # cpu 0 is left for the web server
+        self.assertEqual([config['cpus'] for config in configs], [[cpu] for cpu in range(1, 8)])
+        self.assertTrue(all(config['threads'] == 1 for config in configs))
+
+    def test_count_limits_engines(self):
+        self.assertEqual(len(plan_engines(3, cpus=list(range(8)), nodes=[list(range(8))])), 3)
+
+    def test_threads_stay_on_one_node(self):
+        nodes = [[0, 1, 2, 3], [4, 5, 6, 7]]
+        configs = plan_engines(10, threads=2, cpus=list(range(8)), nodes=nodes)
+
+        # cpu 0 is reserved so cpu 1 can't be paired within node 0, engines alternate between the nodes
+        self.assertEqual([config['cpus'] for config in configs], [[1, 2], [4, 5], [6, 7]])
+        self.assertTrue(all(config['threads'] == 2 for config in configs))
+
+    def test_threads_span_nodes_when_no_node_is_big_enough(self):
+        configs = plan_engines(10, threads=4, reserved_cpus=0, cpus=list(range(4)), nodes=[[0, 1], [2, 3]])
+
+        self.assertEqual([config['cpus'] for config in configs], [[0, 1, 2, 3]])
+
+    def test_small_machine(self):
+        # with a single cpu nothing can be reserved, and threads can't be more than the cpus there are
+        configs = plan_engines(10, threads=4, cpus=[0], nodes=[[0]])
+
+        self.assertEqual(configs, [{
+            'threads': 1,
+            'hash': 16,
+            'memory_limit': memory_limit(1, 16),
+            'cpus': [0],
+        }])
+
+    def test_total_threads_never_exceed_cpus(self):
+        for cpu_count in range(1, 17):
+            for threads in range(1, 5):
+                with self.subTest(cpu_count=cpu_count, threads=threads):
+                    configs = plan_engines(10, threads, cpus=list(range(cpu_count)), nodes=[list(range(cpu_count))])
+                    used = [cpu for config in configs for cpu in config['cpus']]
+
+                    self.assertGreaterEqual(len(configs), 1)
+                    self.assertEqual(len(used), len(set(used)))
+                    self.assertEqual(sum(config['threads'] for config in configs), len(used))
+
+    def test_memory_limit_grows_with_threads(self):
+        one = plan_engines(1, threads=1, reserved_cpus=0, cpus=list(range(8)), nodes=[list(range(8))])[0]
+        eight = plan_engines(1, threads=8, reserved_cpus=0, cpus=list(range(8)), nodes=[list(range(8))])[0]
+
+        # every extra thread needs room for its stack and malloc arena
+        self.assertGreaterEqual(eight['memory_limit'] - one['memory_limit'], 7 * 72 * 1024 * 1024)
+
+    def test_hash_and_nice(self):
+        config = plan_engines(1, hash_mb=64, nice=5, cpus=[0, 1], nodes=[[0, 1]])[0]
+
+        self.assertEqual(config['hash'], 64)
+        self.assertEqual(config['nice'], 5)
+        self.assertGreater(config['memory_limit'], 64 * 1024 * 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import threading
+import unittest
+from project.apps.StockfishApp.processpool import ProcessPool
+
+
+class _Proc():
+    """stands in for a StockfishProcess, the pool only looks at the difficulty property"""
+
+    def __init__(self, difficulty):
+        self.difficulty = difficulty
+
+
+class ProcessPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pool = ProcessPool()
+
+    def test_get_matching_difficulty(self):
+        procs = [_Proc(1), _Proc(3), _Proc(5)]
+        for proc in procs:
+            self.pool.put(proc)
+
+        self.assertIs(self.pool.get(3), procs[1])
+        self.assertIs(self.pool.get(5), procs[2])
+        self.assertIs(self.pool.get(1), procs[0])
+        self.assertEqual(self.pool.qsize(), 0)
+
+    def test_get_borrows_from_biggest_sub_pool(self):
+        self.pool.put(_Proc(1))
+        self.pool.put(_Proc(2))
+        self.pool.put(_Proc(2))
+
+        self.assertEqual(self.pool.get(4).difficulty, 2)
+        self.assertEqual(self.pool.idle_by_difficulty(), {1: 1, 2: 1})
+
+    def test_get_without_difficulty(self):
+        self.pool.put(_Proc(2))
+        self.assertEqual(self.pool.get().difficulty, 2)
+
+    def test_put_uses_current_difficulty(self):
+        proc = _Proc(1)
+        self.pool.put(proc)
+        self.pool.get(4)
+
+        proc.difficulty = 4
+        self.pool.put(proc)
+        self.assertEqual(self.pool.idle_by_difficulty(), {4: 1})
+
+    def test_get_blocks_until_put(self):
+        got = []
+        thread = threading.Thread(target=lambda: got.append(self.pool.get(1)))
+        thread.start()
+
+        proc = _Proc(1)
+        self.pool.put(proc)
+        thread.join(timeout=5)
+
+        self.assertEqual(got, [proc])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,12 +4,30 @@ import unittest
 
 from tests import gamestate_tests
 from tests import stockfishprocess_tests
+from tests import uciprotocol_tests
+from tests import processpool_tests
+from tests import sessions_tests
+from tests import openingbook_tests
+from tests import perft_tests
+from tests import depthcontroller_tests
+from tests import pgn_tests
+from tests import assets_tests
+from tests import placement_tests
 
 loader = unittest.TestLoader()
 suite = unittest.TestSuite()
 
 suite.addTests(loader.loadTestsFromModule(gamestate_tests))
 suite.addTests(loader.loadTestsFromModule(stockfishprocess_tests))
+suite.addTests(loader.loadTestsFromModule(uciprotocol_tests))
+suite.addTests(loader.loadTestsFromModule(processpool_tests))
+suite.addTests(loader.loadTestsFromModule(sessions_tests))
+suite.addTests(loader.loadTestsFromModule(openingbook_tests))
+suite.addTests(loader.loadTestsFromModule(perft_tests))
+suite.addTests(loader.loadTestsFromModule(depthcontroller_tests))
+suite.addTests(loader.loadTestsFromModule(pgn_tests))
+suite.addTests(loader.loadTestsFromModule(assets_tests))
+suite.addTests(loader.loadTestsFromModule(placement_tests))
 
 runner = unittest.TextTestRunner(verbosity=3)
 runner.run(suite)
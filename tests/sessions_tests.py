@@ -0,0 +1,96 @@
+import time
+import unittest
+from project.apps.StockfishApp.sessions import SessionStore, GameSession
+from project.apps.StockfishApp.gamestate import BLACK
+
+
+class GameSessionTestCase(unittest.TestCase):
+    def test_moves(self):
+        session = GameSession('abc', 3)
+        for move in ['e2e4', 'e7e5', 'g1f3']:
+            session.push(move)
+
+        self.assertEqual(len(session), 3)
+        self.assertEqual(session.moves, ['e2e4', 'e7e5', 'g1f3'])
+        self.assertEqual(str(session.position()), 'startpos moves e2e4 e7e5 g1f3')
+
+    def test_black_moves_first(self):
+        # the client lets a player who picked black make the first move of the game
+        session = GameSession('abc', 3, 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR b KQkq - 0 0')
+        session.push('e7e5')
+        session.push('e2e4')
+
+        self.assertEqual(str(session.position()), 'fen rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR b KQkq - 0 0 moves e7e5 e2e4')
+        self.assertEqual(session.position().fen(), 'rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1')
+
+    def test_starting_position_is_startpos(self):
+        session = GameSession('abc', 3, 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 0')
+        self.assertEqual(str(session.position()), 'startpos')
+
+    def test_empty_position(self):
+        self.assertEqual(str(GameSession('abc', 3).position()), 'startpos')
+
+
+class SessionStoreTestCase(unittest.TestCase):
+    def test_create_and_get(self):
+        store = SessionStore()
+        session = store.create(2)
+
+        self.assertIs(store.get(session.game_id), session)
+        self.assertEqual(session.difficulty, 2)
+        self.assertIsNone(store.get('missing'))
+
+        session = store.create(2, 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR b KQkq - 0 0')
+        self.assertEqual(session.position().board.turn, BLACK)
+
+    def test_push_moves(self):
+        store = SessionStore()
+        session = store.create(2)
+        before = store.bytes_used
+
+        store.push_moves(session, 'e2e4', 'e7e5')
+        self.assertEqual(session.moves, ['e2e4', 'e7e5'])
+        self.assertGreater(store.bytes_used, before)
+
+    def test_delete(self):
+        store = SessionStore()
+        session = store.create(2)
+        store.push_moves(session, 'e2e4')
+
+        store.delete(session.game_id)
+        self.assertIsNone(store.get(session.game_id))
+        self.assertEqual(store.bytes_used, 0)
+
+    def test_idle_eviction(self):
+        store = SessionStore(max_idle_seconds=60)
+        old = store.create(1)
+        new = store.create(1)
+        old.last_access = time.monotonic() - 120
+
+        self.assertIsNone(store.get(old.game_id))
+        self.assertIs(store.get(new.game_id), new)
+        self.assertEqual(len(store), 1)
+
+    def test_memory_cap_evicts_least_recently_used(self):
+        store = SessionStore(max_bytes=10000)
+        sessions = [store.create(1) for _ in range(20)]
+        store.get(sessions[0].game_id)  # make the first session the most recently used
+
+        for _ in range(10):
+            store.create(1)
+
+        self.assertLessEqual(store.bytes_used, 10000)
+        self.assertIs(store.get(sessions[0].game_id), sessions[0])
+        self.assertIsNone(store.get(sessions[1].game_id))
+
+    def test_many_sessions_are_small(self):
+        store = SessionStore()
+        for _ in range(1000):
+            store.push_moves(store.create(3), *(['g1f3', 'g8f6', 'f3g1', 'f6g8'] * 10))
+
+        # 40 moves per game should take well under a kilobyte per game
+        self.assertLess(store.bytes_used / len(store), 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import unittest
 import warnings
 from project.apps.StockfishApp.stockfishprocess import StockfishProcess
 from project.apps.StockfishApp.gamestate import Position
+from project.apps.StockfishApp.placement import plan_engines
 
 class ProcessClassTestCase(unittest.TestCase):
     # NOTE: unittest runs this constructor once for each test case, so there
@@ -82,6 +83,32 @@ class ProcessClassTestCase(unittest.TestCase):
             '[a-h][1-8][a-h][1-8]'
         )
 
+    def test_go_info(self):
+        output = self.proc._go(depth=5, info=True)
+
+        self.assertRegex(
+            output['bestmove'],
+            '[a-h][1-8][a-h][1-8]'
+        )
+
+        self.assertEqual(
+            output['info'].depth,
+            5
+        )
+
+        self.assertEqual(
+            output['info'].pv[0],
+            output['bestmove']
+        )
+
+    def test_go_promotion(self):
+        # promoting is the only winning move here, bestmove used to get cut off at 4 characters
+        self.proc._position('fen 7k/P7/8/8/8/8/8/K7 w - - 0 1')
+        self.assertRegex(
+            self.proc._go()['bestmove'],
+            'a7a8[qrbn]'
+        )
+
     def test_position(self):
         self.assertIsNone(
             self.proc._position('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1')
@@ -115,11 +142,75 @@ class ProcessClassTestCase(unittest.TestCase):
             '[a-h][1-8][a-h][1-8]'
         )
 
+    def test_analyse(self):
+        analysis = self.proc.analyse(Position(moves=['e2e4', 'e7e5']), 5)
+
+        self.assertRegex(
+            analysis['bestmove'],
+            '[a-h][1-8][a-h][1-8]'
+        )
+
+        self.assertIsInstance(
+            analysis['info'].score,
+            int
+        )
+
+    def test_perft(self):
+        counts = self.proc.perft(Position(), 2)
+        self.assertEqual(len(counts), 20)
+        self.assertEqual(sum(counts.values()), 400)
+
+    def test_legal_moves(self):
+        self.assertCountEqual(
+            self.proc.legal_moves(Position('7k/P7/8/8/8/8/8/K7 w - - 0 1')),
+            ['a7a8q', 'a7a8r', 'a7a8b', 'a7a8n', 'a1a2', 'a1b1', 'a1b2']
+        )
+
     def test_set_option(self):
         self.assertIsNone(
             self.proc._set_option()
         )
 
+    def test_set_option_only_sends_changes(self):
+        self.proc._set_option(Hash=32)
+        self.assertEqual(self.proc._options['Hash'], '32')
+        self.assertTrue(self.proc._unsynced)
+
+        self.proc._sync()
+        self.proc._set_option(Hash=32)
+        self.assertFalse(self.proc._unsynced)
+
+    def test_new_game_sync(self):
+        self.proc.new_game()
+        self.proc.set_difficulty(self.proc.difficulty)
+        self.assertTrue(self.proc._unsynced)
+
+        self.proc.get_next_move(Position())
+        self.assertFalse(self.proc._unsynced)
+
+    def test_stop(self):
+        # stop() before the search starts ends it as soon as it does, so even a huge depth returns straight away
+        self.proc.stop()
+        self.proc._position(str(Position()))
+        self.assertIn(self.proc._go(depth=100)['bestmove'], Position().legal_moves())
+
+        # new_game() clears it, stop() with no search running sends nothing
+        self.proc.new_game()
+        self.assertFalse(self.proc._stop_requested)
+        self.proc.stop()
+        self.proc.new_game()
+        self.assertEqual(self.proc._isready(), 'readyok\n')
+
+    def test_limits(self):
+        # the limit plan_engines() picks has to leave enough room for the engine to search with its hash and threads
+        config = plan_engines(1, threads=2, hash_mb=32, nice=5, reserved_cpus=0)[0]
+        proc = StockfishProcess(r'..\Stockfish\stockfish.exe', config)
+
+        self.assertEqual(proc._options['Threads'], str(config['threads']))
+        self.assertEqual(proc._options['Hash'], '32')
+        self.assertIn(proc.get_next_move(Position()), Position().legal_moves())
+        del proc
+
     def test_set_difficulty(self):
         # warnings.simplefilter('always')
         for ind in range(-10, 10):
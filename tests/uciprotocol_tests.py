@@ -0,0 +1,95 @@
+import os
+import unittest
+from project.apps.StockfishApp.uciprotocol import UCIReader, BestMove, Info, parse_bestmove, parse_info
+
+
+class UCIReaderTestCase(unittest.TestCase):
+    def setUp(self):
+        read_fd, self.write_fd = os.pipe()
+        self.reader = UCIReader(os.fdopen(read_fd, 'rb', buffering=0))
+
+    def tearDown(self):
+        self.reader.close()
+        os.close(self.write_fd)
+
+    def write(self, data):
+        os.write(self.write_fd, data)
+
+    def test_readline(self):
+        self.write(b'Stockfish 11 by T. Romstad\nid name Stockfish\r\n')
+        self.assertEqual(self.reader.readline(), b'Stockfish 11 by T. Romstad')
+        self.assertEqual(self.reader.readline(), b'id name Stockfish')
+
+    def test_read_until(self):
+        self.write(b'id name Stockfish\noption name Hash\nuciok\nreadyok\n')
+        self.assertEqual(self.reader.read_until(b'uciok'), b'uciok')
+        self.assertEqual(self.reader.read_until('readyok'), b'readyok')
+
+    def test_read_until_only_matches_line_start(self):
+        self.write(b'info string bestmove in text\nbestmove e2e4 ponder e7e5\n')
+        self.assertEqual(self.reader.read_until(b'bestmove'), b'bestmove e2e4 ponder e7e5')
+
+    def test_read_until_across_reads(self):
+        self.write(b'info depth 1 pv e2e4\ninfo depth 2 pv e2e4 e7e5\nbest')
+        self.write(b'move e2e4 ponder e7e5\nreadyok\n')
+        self.assertEqual(self.reader.read_until(b'bestmove'), b'bestmove e2e4 ponder e7e5')
+        self.assertEqual(self.reader.readline(), b'readyok')
+
+    def test_lines_until(self):
+        self.write(b'info depth 1 pv e2e4\nbestmove e2e4\nreadyok\n')
+        self.assertEqual(
+            list(self.reader.lines_until(b'bestmove')),
+            [b'info depth 1 pv e2e4', b'bestmove e2e4']
+        )
+        self.assertEqual(self.reader.readline(), b'readyok')
+
+    def test_eof(self):
+        os.close(self.write_fd)
+        self.write_fd = os.open(os.devnull, os.O_WRONLY)  # so tearDown has something to close
+        with self.assertRaises(EOFError):
+            self.reader.readline()
+
+
+class ParserTestCase(unittest.TestCase):
+    def test_parse_bestmove(self):
+        self.assertEqual(parse_bestmove(b'bestmove e2e4 ponder e7e5'), BestMove('e2e4', 'e7e5'))
+        self.assertEqual(parse_bestmove(b'bestmove e7e8q'), BestMove('e7e8q', ''))
+        self.assertEqual(parse_bestmove(b'bestmove e7e8q ponder a7a8n'), BestMove('e7e8q', 'a7a8n'))
+        self.assertEqual(parse_bestmove(b'bestmove (none)'), BestMove('(none)', ''))
+
+        with self.assertRaises(ValueError):
+            parse_bestmove(b'info depth 1')
+
+    def test_parse_info(self):
+        info = parse_info(
+            b'info depth 10 seldepth 14 multipv 1 score cp 35 nodes 12345 nps 600000 time 20 pv e2e4 e7e5 g1f3'
+        )
+        self.assertIsInstance(info, Info)
+        self.assertEqual(info.depth, 10)
+        self.assertEqual(info.seldepth, 14)
+        self.assertEqual(info.multipv, 1)
+        self.assertEqual(info.score, 35)
+        self.assertIsNone(info.mate)
+        self.assertEqual(info.nodes, 12345)
+        self.assertEqual(info.nps, 600000)
+        self.assertEqual(info.time, 20)
+        self.assertEqual(info.pv, ('e2e4', 'e7e5', 'g1f3'))
+
+    def test_parse_info_mate(self):
+        info = parse_info(b'info depth 5 score mate -2 upperbound nodes 100 pv h7h8q')
+        self.assertEqual(info.mate, -2)
+        self.assertIsNone(info.score)
+        self.assertEqual(info.nodes, 100)
+        self.assertEqual(info.pv, ('h7h8q',))
+
+    def test_parse_info_string(self):
+        info = parse_info(b'info string NNUE evaluation using nn.nnue enabled')
+        self.assertIsNone(info.depth)
+        self.assertIsNone(info.pv)
+
+        with self.assertRaises(ValueError):
+            parse_info(b'bestmove e2e4')
+
+
+if __name__ == '__main__':
+    unittest.main()